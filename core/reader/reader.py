@@ -1,13 +1,22 @@
+import math
+import os
 import sys
+from collections import OrderedDict
 from enum import Enum
+from functools import partial
+from operator import attrgetter
 from pathlib import Path
 from typing import Union, List, Tuple, Optional
 
+import numpy as np
 from PySide6.QtCore import QObject, Qt, QSize, Signal, QPointF, QRectF, QSizeF, Property, QTimer, QEvent, QPoint, QUrl, \
-    QPropertyAnimation, QEasingCurve, QAbstractAnimation
-from PySide6.QtGui import QPixmap, QImageReader, QImage, QCloseEvent, QKeyEvent, QResizeEvent, QColor
+    QPropertyAnimation, QVariantAnimation, QEasingCurve, QAbstractAnimation, QRunnable, QThreadPool, QMetaObject, QBuffer, QByteArray, \
+    QIODevice
+from PySide6.QtGui import QPixmap, QImageReader, QImage, QCloseEvent, QKeyEvent, QResizeEvent, QColor, QPainter, \
+    QTransform, QPixmapCache
 from PySide6.QtWidgets import QGraphicsScene, QGraphicsView, QGraphicsPixmapItem, QApplication, QScroller, \
-    QScrollerProperties, QGraphicsProxyWidget, QGraphicsTextItem, QVBoxLayout
+    QScrollerProperties, QGraphicsProxyWidget, QGraphicsTextItem, QVBoxLayout, QGraphicsObject, \
+    QStyleOptionGraphicsItem, QWidget
 
 from PySide6.QtOpenGLWidgets import QOpenGLWidget
 from loguru import logger
@@ -16,7 +25,8 @@ from qframelesswindow import TitleBar
 
 from gui.common import RotableProgressRing
 from utils import CBZArchive
-from utils.scripts import get_cache_pixmap, delete_cache_pixmap
+from utils.scripts import get_cache_pixmap, delete_cache_pixmap, downscale_image, tile_cache_key, load_cached_tile, \
+    store_cached_tile, decode_jpeg
 
 from core.reader.overlay import ReaderTitle, ReaderSlider, ReaderNavigation, ReaderSettings, ReaderAnimationManager, ReadMode, \
     FitMode, PositionFlags, ZoomWidget
@@ -28,15 +38,17 @@ class SlideDirection(Enum):
     LEFT = "Left"
     RIGHT = "Right"
 
-class PagePixmapItem(QGraphicsPixmapItem, QObject):
+class PagePixmapItem(QGraphicsObject):
     pixmapLoaded = Signal(QPixmap)
 
     PLACEHOLDER_SIZE = QSize(800, 1500)  # Used for boundingRect before image is loaded
+    PLACEHOLDER_COLOR = QColor(128, 128, 128, 60)
 
     def __init__(self, path: Optional[Path] = None, index: int = 0):
-        QGraphicsPixmapItem.__init__(self)
-        QObject.__init__(self)
+        super().__init__()
 
+        self._pixmap = QPixmap()
+        self._transformation_mode = Qt.TransformationMode.FastTransformation
         self._viewport_size = None
         self.setTransformationMode(Qt.TransformationMode.SmoothTransformation)
 
@@ -45,6 +57,8 @@ class PagePixmapItem(QGraphicsPixmapItem, QObject):
         self._expected_size = self.PLACEHOLDER_SIZE
         self._idx = index
         self._mode = FitMode.PAGED
+        self._last_fit: Optional[tuple] = None  # (mode, viewport w, viewport h, pixmap cache key)
+        self._cache_key: Optional[str] = None  # QPixmapCache key of decoded page
 
         # Error text
         self.errorText = QGraphicsTextItem("", self)
@@ -77,6 +91,30 @@ class PagePixmapItem(QGraphicsPixmapItem, QObject):
         else:
             return QRectF(0, 0, self._expected_size.width(), self._expected_size.height())
 
+    def paint(self, painter: QPainter, option: QStyleOptionGraphicsItem, widget: Optional[QWidget] = None):
+        if self._pixmap.isNull():
+            # placeholder while page is decoded in background
+            painter.fillRect(self.boundingRect(), self.PLACEHOLDER_COLOR)
+            return
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform,
+                              self._transformation_mode == Qt.TransformationMode.SmoothTransformation)
+        painter.drawPixmap(0, 0, self._pixmap)
+
+    def pixmap(self) -> QPixmap:
+        return self._pixmap
+
+    def setPixmap(self, pixmap: QPixmap):
+        self.prepareGeometryChange()
+        self._pixmap = pixmap
+        self.update()
+
+    def transformationMode(self) -> Qt.TransformationMode:
+        return self._transformation_mode
+
+    def setTransformationMode(self, mode: Qt.TransformationMode):
+        self._transformation_mode = mode
+        self.update()
+
     def _updatePlaceholderBoundingRect(self, size: QSize | QSizeF):
         """ Update Bounding Rect placeholder it give size"""
         self._expected_size = size
@@ -89,9 +127,12 @@ class PagePixmapItem(QGraphicsPixmapItem, QObject):
     def setFitMode(self, mode: FitMode, viewport_size: Union[QSize, QSizeF]):
         if  mode is None or viewport_size is None:
             return
-        # if mode == self._mode:
-#         #     logger.debug(f"Already setted to mode: {mode}")
-        #     return
+        fit = (mode, viewport_size.width(), viewport_size.height(), self.pixmap().cacheKey())
+        if fit == self._last_fit:
+            # same mode, viewport and pixmap: scale is unchanged
+            return
+        self._last_fit = fit
+
         if self.pixmap().isNull():
             # No pixmap loaded yet, no scaling
             self.setScale(1.0)
@@ -127,25 +168,54 @@ class PagePixmapItem(QGraphicsPixmapItem, QObject):
             logger.info("Page {} already loaded".format(self._idx))
             return
 
-        if not self.path:
+        if not self._page_path:
             self.showLoading()
             return
 
+        if self.loadCached():
+            return
+
         reader = QImageReader(str(self._page_path))
         reader.setAutoTransform(True)
-        img = reader.read()
+        self.setImage(reader.read())
+
+    def setPixmapCacheKey(self, key: Optional[str]):
+        """ Key decoded page is shared under in global QPixmapCache, None to not cache"""
+        self._cache_key = key
+
+    def loadCached(self) -> bool:
+        """ Load page from QPixmapCache, returns False if it was evicted (or never cached)"""
+        if self._is_loaded:
+            return True
+        if not self._cache_key:
+            return False
+        pixmap = QPixmapCache.find(self._cache_key)
+        if pixmap is None or pixmap.isNull():
+            return False
+        self._applyPixmap(pixmap)
+        return True
+
+    def setImage(self, img: QImage):
+        """ Set page from an already decoded image (must be called from gui thread)"""
+        if self._is_loaded:
+            return
 
         if img.isNull():
             self.showError("Failed to load image.")
             return
 
         pixmap = QPixmap.fromImage(img)
+        if self._cache_key:
+            QPixmapCache.insert(self._cache_key, pixmap)
+        self._applyPixmap(pixmap)
+
+    def _applyPixmap(self, pixmap: QPixmap):
         self.setPixmap(pixmap)
         self._expected_size = pixmap.size()
         self._is_loaded = True
         self.prepareGeometryChange()
         self.pixmapLoaded.emit(pixmap)
-        logger.info(f"Page loaded {self.index}: {pixmap.size()}")
+        logger.info(f"Page loaded {self._idx}: {pixmap.size()}")
 
     def unload(self):
         if not self._is_loaded:
@@ -156,6 +226,25 @@ class PagePixmapItem(QGraphicsPixmapItem, QObject):
         self._is_loaded = False
         self.prepareGeometryChange()
 
+    def reset(self, path: Optional[Path] = None, index: int = 0):
+        """ Reuse item for another page instead of allocating a new one (see ComicReader page pool)"""
+        self.prepareGeometryChange()
+        self._pixmap = QPixmap()
+        self._page_path = path
+        self._is_loaded = False
+        self._expected_size = self.PLACEHOLDER_SIZE
+        self._idx = index
+        self._last_fit = None
+        self._cache_key = None
+        self.setScale(1.0)
+        self.setPos(0, 0)
+        self.setVisible(True)
+        self.hideLoading()
+        self.errorText.setVisible(False)
+        self.errorImage.setVisible(False)
+        if path is None:
+            self.showLoading()
+
     def showLoading(self):
         self._move_progress_to_center()
         # logger.debug(f"Page loading {self._idx}")
@@ -234,17 +323,13 @@ class PagePixmapItem(QGraphicsPixmapItem, QObject):
     def getPath(self)->Optional[Path]:
         return self._page_path
 
-    path = Property(Path, getPath, setPath)
-
-
     def set_index(self, index: int):
+        """ set the index of page used for layout, lazy loading"""
         self._idx = index
 
     def get_index(self):
         return self._idx
 
-    index = Property(int, get_index, set_index, doc = "set the index of page used for layout, lazy loading")
-
     def loaded(self):
         return self._is_loaded
 
@@ -254,7 +339,194 @@ class PagePixmapItem(QGraphicsPixmapItem, QObject):
     def getPosition(self) -> QPointF:
         return self.pos()
 
-    position = Property(QPointF, getPosition, setPosition)
+
+class PageDecodeTask(QRunnable):
+    """ Decode a single page in a worker thread, result is delivered through the decoder signals"""
+    DCT_FORMATS = {b"jpeg", b"jpg"}
+
+    def __init__(self, decoder: "PageDecoder", index: int, path: Path, max_width: int = 0,
+                 cache_key: Optional[str] = None, archive: Optional[CBZArchive] = None, generation: int = 0):
+        super().__init__()
+        self.decoder = decoder
+        self.index = index
+        self.generation = generation  # decoder generation at submit, results of older generations are dropped
+        self.path = path
+        self.max_width = max_width
+        self.cache_key = cache_key
+        self.archive = archive
+
+    def run(self):
+        if self.generation != self.decoder.generation() or not self.decoder.isWanted(self.index):
+            # page left the preload window (or decoder was cleared) while queued
+            self.decoder.taskCancelled.emit(self.generation, self.index)
+            return
+
+        if self.cache_key:
+            img = load_cached_tile(self.cache_key)
+            if img is not None:
+                self.decoder.taskDecoded.emit(self.generation, self.index, img)
+                return
+
+        if self.archive is not None:
+            # page is read from archive into memory in worker, overlapping io of other pages with decode
+            try:
+                data = self.archive.get_data(self.index)
+            except Exception as e:
+                if self.archive.closed:
+                    # archive was closed (chapter changed) while page was being read
+                    self.decoder.taskCancelled.emit(self.generation, self.index)
+                else:
+                    self.decoder.taskFailed.emit(self.generation, self.index, str(e))
+                return
+        else:
+            data = None
+
+        # libjpeg-turbo when available, otherwise (or for non jpeg pages) Qt image plugins
+        img = decode_jpeg(data, self.max_width) if data is not None else None
+        if img is None:
+            img = self._read(data)
+            if img is None:
+                return
+        if self.max_width:
+            img = downscale_image(img, self.max_width)
+        self.decoder.taskDecoded.emit(self.generation, self.index, img)
+
+    def _read(self, data: Optional[bytes]) -> Optional[QImage]:
+        """ Decode with QImageReader from in memory data (or page path), emits decodeFailed and returns None on error"""
+        buffer = None
+        if data is not None:
+            buffer = QBuffer()
+            buffer.setData(QByteArray(data))
+            buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+            reader = QImageReader(buffer)
+        else:
+            reader = QImageReader(str(self.path))
+        reader.setAutoTransform(True)
+        if self.max_width and bytes(reader.format()) in self.DCT_FORMATS:
+            size = reader.size()
+            if size.isValid() and size.width() > self.max_width:
+                # jpeg can be scaled in DCT domain while decoding
+                reader.setScaledSize(size.scaled(self.max_width, size.height(), Qt.AspectRatioMode.KeepAspectRatio))
+        img = reader.read()
+        if buffer is not None:
+            buffer.close()
+        if img.isNull():
+            self.decoder.taskFailed.emit(self.generation, self.index, reader.errorString())
+            return None
+        return img
+
+
+class PageDecoder(QObject):
+    """
+        Batch decode pages on a thread pool so io and decode are pipelined across cores.
+        QImage is decoded in worker, conversion to QPixmap happens in gui thread on `decoded`.
+        """
+    decoded = Signal(int, QImage)
+    decodeFailed = Signal(int, str)
+    decodeCancelled = Signal(int)
+    # emitted by workers with the generation the task was submitted in, relayed above when still current
+    taskDecoded = Signal(int, int, QImage)
+    taskFailed = Signal(int, int, str)
+    taskCancelled = Signal(int, int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pool = QThreadPool(self)
+        # leave a core for the gui thread
+        self._pool.setMaxThreadCount(max(1, (os.cpu_count() or 2) - 1))
+        self._pending: set[int] = set()
+        self._wanted: Optional[frozenset[int]] = None  # None: every submitted page is wanted
+        self._max_width = 0  # 0: decode at original size
+        self._cache_namespace: Optional[str] = None  # identifies the archive for disk tile cache
+        self._archive: Optional[CBZArchive] = None  # pages are read from archive instead of extracted files
+        self._generation = 0  # bumped by clear(), tasks still running for the old pages are ignored
+
+        self.taskDecoded.connect(self._onTaskDecoded)
+        self.taskFailed.connect(self._onTaskFailed)
+        self.taskCancelled.connect(self._onTaskCancelled)
+
+    def generation(self) -> int:
+        return self._generation
+
+    def _finish(self, generation: int, index: int) -> bool:
+        """ Mark page done, False when the task belongs to a cleared generation"""
+        if generation != self._generation:
+            return False
+        self._pending.discard(index)
+        return True
+
+    def _onTaskDecoded(self, generation: int, index: int, img: QImage):
+        if self._finish(generation, index):
+            self.decoded.emit(index, img)
+
+    def _onTaskFailed(self, generation: int, index: int, error: str):
+        if self._finish(generation, index):
+            self.decodeFailed.emit(index, error)
+
+    def _onTaskCancelled(self, generation: int, index: int):
+        if self._finish(generation, index):
+            self.decodeCancelled.emit(index)
+
+    def isPending(self, index: int) -> bool:
+        return index in self._pending
+
+    def isWanted(self, index: int) -> bool:
+        wanted = self._wanted
+        return wanted is None or index in wanted
+
+    def retain(self, indices: Optional[set[int]]):
+        """ Queued pages outside indices are skipped when they reach a worker, None to keep all"""
+        self._wanted = frozenset(indices) if indices is not None else None
+
+    def setMaxWidth(self, width: int):
+        """ Pages wider than width are downscaled in the worker, 0 to disable"""
+        self._max_width = max(0, width)
+
+    def getMaxWidth(self) -> int:
+        return self._max_width
+
+    def setCacheNamespace(self, namespace: Optional[str]):
+        """ Enable disk cache of decoded (downscaled) pages for archive identified by namespace"""
+        self._cache_namespace = namespace
+
+    def setArchive(self, archive: Optional[CBZArchive]):
+        """ Set archive pages are read from (by index) before decoding, None for plain files"""
+        self._archive = archive
+
+    def _cacheKey(self, index: int) -> Optional[str]:
+        # full size pages are not worth caching as raw pixels
+        if not self._cache_namespace or not self._max_width:
+            return None
+        return tile_cache_key(self._cache_namespace, index, self._max_width)
+
+    def persist(self, index: int, img: QImage):
+        """ Store a shown page in the disk tile cache from a worker, prefetched pages that are never shown are not"""
+        key = self._cacheKey(index)
+        if key is not None and img.width() <= self._max_width:
+            QThreadPool.globalInstance().start(lambda: store_cached_tile(key, img))
+
+    def pixmapKey(self, index: int) -> Optional[str]:
+        """ QPixmapCache key of page decoded at current max width, None without archive namespace"""
+        if not self._cache_namespace:
+            return None
+        return f"cbz:{self._cache_namespace}:{self._max_width}:{index}"
+
+    def decode(self, pages: List[Tuple[int, Path]], priority: int = 0):
+        """ Submit pages in index order, pages already queued are skipped. Higher priority runs first"""
+        for index, path in sorted(pages, key=lambda page: page[0]):
+            if index in self._pending or path is None:
+                continue
+            self._pending.add(index)
+            task = PageDecodeTask(self, index, path, self._max_width, self._cacheKey(index), self._archive,
+                                  self._generation)
+            self._pool.start(task, priority)
+
+    def clear(self):
+        """ Drop queued pages, pages already decoding finish but their results are not delivered"""
+        self._generation += 1
+        self._pool.clear()
+        self._pending.clear()
+        self._wanted = None
 
 
 class LayoutManager(QObject):
@@ -272,6 +544,9 @@ class LayoutManager(QObject):
         self.view_mode = mode
         self.fit_mode = FitMode.DEFAULT
         self._layout_items: List[PagePixmapItem] = []
+        # scene geometry of items (SoA) in continuous mode, used for vectorized visibility test
+        self._tops = np.zeros(0, dtype=np.float64)
+        self._heights = np.zeros(0, dtype=np.float64)
 
         self._view_size = QSize(1400, 780) #used for fit mode
         self._current = 0
@@ -362,11 +637,27 @@ class LayoutManager(QObject):
     def items(self)-> List[PagePixmapItem]:
         return self._layout_items
 
+    def releaseAll(self) -> List[PagePixmapItem]:
+        """ Detach all items from layout and scene, returns them so caller can reuse them"""
+        self.ani.stop()
+        items = self._layout_items
+        self._layout_items = []
+        for item in items:
+            self.scene.removeItem(item)
+        self._tops = np.zeros(0, dtype=np.float64)
+        self._heights = np.zeros(0, dtype=np.float64)
+        self._current = 0
+        return items
+
     def itemAt(self, index: int) -> PagePixmapItem:
         return self._layout_items[index]
 
     def sort_layout_items(self):
-        self._layout_items.sort(key=lambda item: item.index)
+        self._layout_items.sort(key=lambda item: item.get_index())
+
+    def itemGeometry(self) -> Tuple[np.ndarray, np.ndarray]:
+        """ Return (tops, heights) of items in scene coordinates, ordered as `items()`"""
+        return self._tops, self._heights
 
 
     def arrange_items(self, starting_index: int = 0):
@@ -376,17 +667,24 @@ class LayoutManager(QObject):
         self.itemArranging.emit()
         self._is_arranging = True
         starting_index = min(starting_index, len(self._layout_items) - 1 ) if starting_index else 0
-        match self.view_mode:
-            case ReadMode.CONTINUOUS_VERTICAL:
-                self._arrange_continuous_vertical(starting_index = starting_index)
-            case ReadMode.CONTINUOUS_VERTICAL_GAPS:
-                self._arrange_continuous_vertical(self._page_spacing, starting_index = starting_index)
-            case ReadMode.LEFT2RIGHT:
-                self._arrange_paged(starting_index = starting_index)
-            case ReadMode.RIGHT2LEFT:
-                self._arrange_paged(starting_index = starting_index)
-            case _:
-                logger.debug(f"Unknown mode: {self.view_mode}")
+        blocked = self.scene.blockSignals(True)
+        try:
+            match self.view_mode:
+                case ReadMode.CONTINUOUS_VERTICAL:
+                    self._arrange_continuous_vertical(starting_index = starting_index)
+                case ReadMode.CONTINUOUS_VERTICAL_GAPS:
+                    self._arrange_continuous_vertical(self._page_spacing, starting_index = starting_index)
+                case ReadMode.LEFT2RIGHT:
+                    self._arrange_paged(starting_index = starting_index)
+                case ReadMode.RIGHT2LEFT:
+                    self._arrange_paged(starting_index = starting_index)
+                case _:
+                    logger.debug(f"Unknown mode: {self.view_mode}")
+        finally:
+            self.scene.blockSignals(blocked)
+        # view listens to the (blocked) scene signals, sync it once after the batch
+        self.view.updateSceneRect(self.scene.sceneRect())
+        self.view.viewport().update()
 
 #         # logger.debug(f"arranged {len(self._layout_items)} items")
         self.itemArranged.emit()
@@ -405,7 +703,12 @@ class LayoutManager(QObject):
         # Default to no spacing if none is provided
         page_spacing = page_spacing if page_spacing is not None else 0
 
-        for item in self._layout_items[starting_index:]:
+        items_len = len(self._layout_items)
+        if len(self._tops) != items_len:
+            self._tops = np.zeros(items_len, dtype=np.float64)
+            self._heights = np.zeros(items_len, dtype=np.float64)
+
+        for idx, item in enumerate(self._layout_items[starting_index:], start=starting_index):
             fit_mode = FitMode.FULLSCREEN if self.fit_mode == FitMode.DEFAULT else self.fit_mode
             view_size = self._view_size
             if self.fit_mode == FitMode.DEFAULT:
@@ -418,10 +721,12 @@ class LayoutManager(QObject):
 #             # logger.debug(f"Item bounding rect: {item_bounding_rect}, page: {item.index}, "
             #              f"page_spacing: {page_spacing}, pos: {y}")
 
-            if item.index == self._current:
+            if item.get_index() == self._current:
                 # self.view.verticalScrollBar().setValue(y)
                 des = y  # track position to scroll to current
 
+            self._tops[idx] = item_bounding_rect.top()
+            self._heights[idx] = item_bounding_rect.height()
             y += item_bounding_rect.height() + page_spacing
 
         self.resetSceneRect()
@@ -436,7 +741,7 @@ class LayoutManager(QObject):
             fit_mode = FitMode.PAGED if self.fit_mode == FitMode.DEFAULT else self.fit_mode
             item.setFitMode(fit_mode, self._view_size) # fit page to screen
             item.setPos(0, 0)
-            if item.index != self._current:
+            if item.get_index() != self._current:
 
                 item.setVisible(False)
             else:
@@ -501,7 +806,7 @@ class LayoutManager(QObject):
 
         if self.viewMode in [ReadMode.LEFT2RIGHT, ReadMode.RIGHT2LEFT]:
             for item in self._layout_items:
-                if page_num == item.index:
+                if page_num == item.get_index():
                     self.adjustSceneRectToItem(item)
                     self.moveItemToCenter(item)
                     self.scrollTo(QPointF(0, 0), 0)
@@ -514,9 +819,9 @@ class LayoutManager(QObject):
             if result_item.loaded():
                 if self.pageAnimation:
                     self.slide_animation(result_item, direction, duration)
-                QTimer.singleShot(self.ani.duration()+20, lambda: self.pageChanged.emit(page_num)) #slight delay to let slide animation finish(same as ani duration)
+                QTimer.singleShot(self.ani.duration()+20, partial(self.pageChanged.emit, page_num)) #slight delay to let slide animation finish(same as ani duration)
             else:
-                QTimer.singleShot(0, lambda :self.pageChanged.emit(page_num))
+                QTimer.singleShot(0, partial(self.pageChanged.emit, page_num))
 
     def go_left_page(self, current: int, duration: int = 0) -> None:
         if self.viewMode == ReadMode.LEFT2RIGHT:
@@ -568,7 +873,7 @@ class LayoutManager(QObject):
         item.setPos(start)
 #         logger.debug(f"SlideAnimation- duration: {duration}, start: {start}, end: {end}, direction: {direction}")
         self.ani.setTargetObject(item)
-        self.ani.setPropertyName(b"position")
+        self.ani.setPropertyName(b"pos")
         self.ani.setStartValue(start)
         self.ani.setEndValue(end)
 
@@ -576,13 +881,22 @@ class LayoutManager(QObject):
 
 
 class LazyLoader(QObject):
+    """
+        Two tier page loading: pages in visible range (+ margin) are loaded into their items,
+        pages in the surrounding prefetch rings are decoded in background at lower priority
+        and kept as images in a small LRU until they are scrolled into range.
+        """
     pageChanged = Signal(int)
-    def __init__(self, view: QGraphicsView, layout_manager: LayoutManager, preload_margin: int = 1):
+
+    VISIBLE_PRIORITY = 10
+    def __init__(self, view: QGraphicsView, layout_manager: LayoutManager, preload_margin: int = 1,
+                 direction_margin: int = 3):
         super().__init__()
         self.view = view
         self.scene = view.scene()
         self.layoutManager = layout_manager
         self.preload_margin = preload_margin  # Extra margin pages for preloading
+        self.direction_margin = direction_margin  # Additional pages preloaded in scroll direction
 
         self._scroll_timer = QTimer()
         self._scroll_timer.setSingleShot(True)
@@ -590,12 +904,28 @@ class LazyLoader(QObject):
         self._scroll_timer.timeout.connect(self._updateView)
 
         self._current_idx = 0
+        self._last_current = 0  # used to detect scroll direction
         self._current_range: Tuple[int, int] = (0, self.preload_margin)
 
+        # tier 2: decoded but not yet shown pages
+        self.prefetch_rings: Tuple[int, ...] = (5, 10)
+        self.prefetch_limit = 16
+        self._prefetched: OrderedDict[int, QImage] = OrderedDict()
+
+        self.decoder = PageDecoder(self)
+
+        # coalesce re-arrange when multiple pages are decoded at once
+        self._arrange_timer = QTimer()
+        self._arrange_timer.setSingleShot(True)
+        self._arrange_timer.setInterval(0)
+        self._arrange_timer.timeout.connect(self.layoutManager.arrange_items)
+
         self._signal_handler()
 
     def _signal_handler(self):
         self.layoutManager.pageChanged.connect(self._updateView)
+        self.decoder.decoded.connect(self._onPageDecoded)
+        self.decoder.decodeFailed.connect(self._onPageDecodeFailed)
 
     def start_check_timer(self):
         self._updateView()
@@ -635,114 +965,173 @@ class LazyLoader(QObject):
 
         minimum, maximum = self._findVisibleImageRange()
         logger.debug(f"current index: {current}, visible range: {minimum}, {maximum}")
-        minimum = max(minimum-self.preload_margin, 0)
-        maximum = min(maximum+self.preload_margin, len(self.layoutManager.items()))
+        # bias preload towards the direction user is scrolling
+        delta = current - self._last_current
+        self._last_current = current
+        before = after = self.preload_margin
+        if delta > 0:
+            after += self.direction_margin
+        elif delta < 0:
+            before += self.direction_margin
+
+        minimum = max(minimum-before, 0)
+        maximum = min(maximum+after, len(self.layoutManager.items()))
+        self._current_range = (minimum, maximum)
+
+        # drop queued pages which left the window and prefetched pages too far away
+        items_len = len(self.layoutManager.items())
+        reach = max(self.prefetch_rings, default=0)
+        wanted = set(range(minimum, maximum + 1))
+        wanted.update(range(max(current - reach, 0), min(current + reach + 1, items_len)))
+        self.decoder.retain(wanted)
+        for index in [index for index in self._prefetched if index not in wanted]:
+            del self._prefetched[index]
+
         self.lazy_load(minimum, maximum)
+        self._prefetch(current, minimum, maximum)
         self.pageChanged.emit(current)
 
+    def _prefetch(self, current: int, minimum: int, maximum: int):
+        """ Decode expanding rings around current page in background, nearest ring first"""
+        items = self.layoutManager.items()
+        for priority, ring in enumerate(self.prefetch_rings):
+            pages: List[Tuple[int, Path]] = []
+            for index in range(max(current - ring, 0), min(current + ring + 1, len(items))):
+                if minimum <= index <= maximum or index in self._prefetched:
+                    continue
+                item = items[index]
+                if not item.loaded():
+                    pages.append((item.get_index(), item.getPath()))
+            # pages already queued by a nearer ring are skipped by decoder
+            self.decoder.decode(pages, -priority)
+
+    def _storePrefetched(self, index: int, img: QImage):
+        self._prefetched[index] = img
+        self._prefetched.move_to_end(index)
+        while len(self._prefetched) > self.prefetch_limit:
+            self._prefetched.popitem(last=False)
+
+    def reset(self, current: int = 0):
+        """ Forget state of previous archive and load pages around current"""
+        self.decoder.clear()
+        self._prefetched.clear()
+        self._current_idx = current
+        self._last_current = current
+        self._updateViewFor(current)
+
     def _isVisibleInViewport(self, item: PagePixmapItem):
         """Checks if an image is visible in the current viewport."""
         item_rect = item.sceneBoundingRect()
         viewport_rect = self.view.mapToScene(self.view.viewport().rect()).boundingRect()
-        if viewport_rect.intersects(item_rect):
-            logger.debug(f"Item rect: {item_rect}, viewport rect: {viewport_rect}, Item: {item.index} is visible: {viewport_rect.intersects(item_rect)}")
         return viewport_rect.intersects(item_rect)
 
+    def _visibleIndices(self) -> np.ndarray:
+        """Indices (into layout items) of all items intersecting the viewport, in continuous mode."""
+        tops, heights = self.layoutManager.itemGeometry()
+        if not len(tops):
+            return np.zeros(0, dtype=np.intp)
+        rect = self.view.mapToScene(self.view.viewport().rect()).boundingRect()
+        visible = (tops + heights > rect.top()) & (tops < rect.bottom())
+        return np.nonzero(visible)[0]
+
     def _findVisibleInViewport(self)->int:
         mode: ReadMode = self.layoutManager.viewMode
         items = self.layoutManager.items()
-        items_len = len(items)
-
-        # **1. Get the Y-coordinate of the viewport center**
-        rect = self.view.mapToScene(self.view.viewport().rect()).boundingRect()
-        viewport_center_y = rect.y() + (rect.height() // 2)
-
 
         if mode in [ReadMode.CONTINUOUS_VERTICAL, ReadMode.CONTINUOUS_VERTICAL_GAPS]:
-            low, high = 0, items_len - 1
-            found_idx = -1
-
-            # Perform binary search to find a visible image**
-            while low <= high:
-                mid = (low + high) // 2
-                real_idx = self._get_img_idx(mid, items_len - 1)  # Adjust for reverse order
-                image = items[real_idx]
-
-                if self._isVisibleInViewport(image):
-                    found_idx = mid
-                    break  # Stop once a visible image is found
-                elif image.y() < viewport_center_y:
-                    low = mid + 1  # Search upwards
-                else:
-                    high = mid - 1  # Search downwards
-
-            # If no visible image is found, fallback to a linear search**
-            if found_idx == -1:
-                for i, item in enumerate(items):
-                    if self._isVisibleInViewport(item):
-                        found_idx = i
-                        break
-
-            return found_idx
+            visible = self._visibleIndices()
+            return int(visible[0]) if len(visible) else -1
 
         elif mode in [ReadMode.LEFT2RIGHT, ReadMode.RIGHT2LEFT]:
-            for item in items:
+            # only the current page is shown in paged mode
+            current = self.layoutManager.current_page
+            if 0 <= current < len(items):
+                item = items[current]
                 if item.isVisible() and self._isVisibleInViewport(item):
-                    return item.index
+                    return item.get_index()
 
         return -1
 
     def _findVisibleImageRange(self):
         """
-        Finds the first and last visible image indices efficiently using binary search.
+        Finds the first and last visible image indices with a single vectorized test.
         Returns: (first_visible_idx, last_visible_idx)
         """
-        images = self.layoutManager.items()
-        imgs_len = len(images)
-        found_idx = self._findVisibleInViewport()
-
-        # **1. Get the Y-coordinate of the viewport center**
         if self.layoutManager.viewMode in [ReadMode.CONTINUOUS_VERTICAL, ReadMode.CONTINUOUS_VERTICAL_GAPS]:
-            # **4. Expand left to find the first visible image**
-            first_visible_idx = found_idx
-            while first_visible_idx > 0:
-                real_idx = self._get_img_idx(first_visible_idx - 1, imgs_len - 1)
-                if self._isVisibleInViewport(images[real_idx]):
-                    first_visible_idx -= 1
-                else:
-                    break
-
-            # **5. Expand right to find the last visible image**
-            last_visible_idx = found_idx
-            while last_visible_idx < imgs_len - 1:
-                real_idx = self._get_img_idx(last_visible_idx + 1, imgs_len - 1)
-                if self._isVisibleInViewport(images[real_idx]):
-                    last_visible_idx += 1
-                else:
-                    break
-
-            return first_visible_idx, last_visible_idx
-
-        elif self.layoutManager.viewMode in [ReadMode.LEFT2RIGHT, ReadMode.RIGHT2LEFT]:
-            return found_idx, found_idx
+            visible = self._visibleIndices()
+            if not len(visible):
+                return -1, -1
+            return int(visible[0]), int(visible[-1])
 
+        found_idx = self._findVisibleInViewport()
         return found_idx, found_idx
 
-    def _get_img_idx(self, idx: int, from_max: int) -> int:
-        """Handles reversed order in RightToLeft or BottomToTop scrolling."""
-        return idx
-
     def lazy_load(self, minimum: int, maximum: int):
 #         logger.debug(f"lazy loading {minimum}, {maximum}")
+        pages: List[Tuple[int, Path]] = []
         for item in self.layoutManager.items():
-            if item.index >= minimum and item.index <= maximum:
-                self.load_item(item)
+            index = item.get_index()
+            if minimum <= index <= maximum:
+                if item.loaded():
+                    continue
+                item.setPixmapCacheKey(self.decoder.pixmapKey(index))
+                if item.loadCached():
+                    continue
+                if index in self._prefetched:
+                    img = self._prefetched.pop(index)
+                    item.setImage(img)
+                    self.decoder.persist(index, img)
+                elif not self.decoder.isPending(index):
+                    pages.append((index, item.getPath()))
             else:
                 self.unload_item(item)
+        self.decoder.decode(pages, self.VISIBLE_PRIORITY)
         self.layoutManager.arrange_items()
 
+    def reload(self):
+        """ Drop decoded pages and decode current range again"""
+        self.decoder.clear()
+        self._prefetched.clear()
+        for item in self.layoutManager.items():
+            self.unload_item(item)
+        self.lazy_load(*self._current_range)
+
+    def _itemForIndex(self, index: int) -> Optional[PagePixmapItem]:
+        items = self.layoutManager.items()
+        if 0 <= index < len(items) and items[index].get_index() == index:
+            return items[index]
+        for item in items:
+            if item.get_index() == index:
+                return item
+        return None
+
+    def _onPageDecoded(self, index: int, img: QImage):
+        minimum, maximum = self._current_range
+        if not minimum <= index <= maximum:
+            if self.decoder.isWanted(index):
+                self._storePrefetched(index, img)
+            # else: page scrolled out of range while decoding
+            return
+        item = self._itemForIndex(index)
+        if item is None:
+            return
+        item.setImage(img)
+        self.decoder.persist(index, img)
+        self._arrange_timer.start()
+
+    def _onPageDecodeFailed(self, index: int, error: str):
+        logger.warning(f"Failed to decode page {index}: {error}")
+        item = self._itemForIndex(index)
+        if item is not None:
+            item.showError("Failed to load image.")
+
     def load_item(self, item: PagePixmapItem):
-        item.load()
+        if item.loaded():
+            return
+        item.setPixmapCacheKey(self.decoder.pixmapKey(item.get_index()))
+        if item.loadCached():
+            return
+        self.decoder.decode([(item.get_index(), item.getPath())], self.VISIBLE_PRIORITY)
 
     def unload_item(self, item: PagePixmapItem):
         item.unload()
@@ -757,6 +1146,40 @@ class PageManager:
 
 
 class ComicReader(QGraphicsView):
+    PIXMAP_CACHE_LIMIT = 64_000  # KiB
+    PIXMAP_CACHE_LIMIT_DISABLED = 10_240  # KiB, Qt default
+
+    # (sender attribute, signal, slot path on self) wired by _signal_handler
+    _WIRING = (
+        ("lazy_loader", "pageChanged", "slider.setCurrentPageIndex"), #slider show page from 1
+        ("slider", "pageIndexChanged", "layout.go_to_page"),
+        #bottom nav
+        ("bottom_nav", "settingsSignal", "toggleSettings"),
+        ("bottom_nav", "zoomInSignal", "_zoom_in"),
+        ("bottom_nav", "zoomOutSignal", "_zoom_out"),
+        # settings
+        ("settings", "viewModeChanged", "setViewMode"),
+        ("settings", "fitModeChanged", "setFitMode"),
+        ("settings", "zoomStepChanged", "setZoomSteps"),
+        ("settings", "pageGapChanged", "setPageGap"),
+        ("settings", "autoCropBorderToggled", "autoCropBorder"),
+        ("settings", "backgroundColorChanged", "setBackgroundColor"),
+        #navigation settings
+        ("settings", "autoScrollChanged", "autoScroll"),
+        ("settings", "scrollSensitivityChanged", "setScrollSensitivity"),
+        ("settings", "pageSnappingToggled", "setPageSnap"),
+        ("settings", "pageTurnAnimationToggled", "pageTurnAnimation"),
+        ("settings", "showPageNumToggled", "showPageNumber"),
+        #advance settings
+        ("settings", "cacheImageToggled", "cacheImage"),
+        ("settings", "smoothScrollToggled", "setSmoothScroll"),
+        ("settings", "grayScaleToggled", "grayScaleImage"),
+        ("settings", "invertToggled", "invertImage"),
+        ("settings", "settingPositionChanged", "setSettingsPosition"),
+        ("settings", "settingWidthChanged", "setSettingsWidth"),
+        ("settings", "forceHorizontalSliderToggled", "forceHorizontalSlider"),
+    )
+
     def __init__(self, parent=None):
         super().__init__(parent)
 
@@ -766,14 +1189,20 @@ class ComicReader(QGraphicsView):
         self.viewport().installEventFilter(self)
         self._screen_geometry = QApplication.primaryScreen().availableGeometry() # QRect(0, 0, 1463, 823)
         self._scene = QGraphicsScene(self)
+        # pages are laid out sequentially, BSP index is pure overhead on every setPos
+        self._scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex)
         self.setScene(self._scene)
         self.zoom_factor = 1.15
         self.min_zoom = 0.1
         self.max_zoom = 5.0
         self.current_scale = 1.0
+        self._zoom_levels: List[float] = []
+        self._zoom_idx = 0
+        self._buildZoomLevels()
         self.layout = LayoutManager(self, ReadMode.CONTINUOUS_VERTICAL, parent=self)
         self.layout.pageSpacing = 50
         self.lazy_loader = LazyLoader(self, self.layout, 1)
+        self.lazy_loader.decoder.setMaxWidth(self._decodeWidth(self.layout.fitMode))
 
         #overlay
         self.top_nav = ReaderTitle(self)
@@ -793,18 +1222,43 @@ class ComicReader(QGraphicsView):
         #animation
         self.ani_manager = ReaderAnimationManager(self.top_nav, self.bottom_nav, self.settings)
 
+        self._page_pool: List[PagePixmapItem] = []  # released page items, reused by create_page
+        self._gestures: set[int] = set()  # hash((id(viewport), gesture)) of gestures already grabbed
+
+        # coalesce resize ticks (window drag) into one overlay relayout per frame
+        self._resize_timer = QTimer(self)
+        self._resize_timer.setSingleShot(True)
+        self._resize_timer.setInterval(16)
+        self._resize_timer.timeout.connect(self._applyLayout)
+        self._top_nav_height = self.top_nav.height()
+        self._bottom_nav_height = self.bottom_nav.height()
+        self._nav_size_dirty = True  # nav heights are measured again only after nav content changed
+        self._connections: List[QMetaObject.Connection] = []
+
+        # page navigation hotkeys, key -> layout method taking current page
+        self._key_map = {
+            Qt.Key.Key_Left: self.layout.go_left_page,  # Left arrow → previous page
+            Qt.Key.Key_Right: self.layout.go_right_page,  # Right arrow → next page
+        }
+
+        # auto scroll drives scrollbar directly, no kinetic scroller sampling
+        self._auto_anim = QVariantAnimation(self)
+        self._auto_anim.setEasingCurve(QEasingCurve.Type.Linear)
+        self._auto_anim.valueChanged.connect(self.verticalScrollBar().setValue)
+
         self._setup_scroller()
         self._signal_handler()
+        self.cacheImage(True)  # settings toggle is checked by default
 
         self._updateSliderPosition(force=True)
         self._updateSettingPosition(force=True)
 
     def _onScrollChanged(self):
+        # single persistent connection, scroll only drives lazy loading in continuous modes
+        if self.layout.viewMode not in (ReadMode.CONTINUOUS_VERTICAL, ReadMode.CONTINUOUS_VERTICAL_GAPS):
+            return
         self.hideOptions()
-        if self.layout.arranging and self.layout.viewMode in [ReadMode.LEFT2RIGHT, ReadMode.RIGHT2LEFT]:
-            self.lazy_loader.stop_check_timer()
-        else:
-            self.lazy_loader.start_check_timer()
+        self.lazy_loader.start_check_timer()
 
     def _setup_scroller(self):
         scroller = QScroller.scroller(self.viewport())
@@ -815,43 +1269,29 @@ class ComicReader(QGraphicsView):
 
 
         # Use QScroller class method to grab gesture
-        QScroller.grabGesture(self.viewport(), QScroller.LeftMouseButtonGesture)
-
-    def _signal_handler(self):
-        self.verticalScrollBar().valueChanged.connect(self._onScrollChanged)
-        self.lazy_loader.pageChanged.connect(self.slider.setCurrentPageIndex) #slider show page from 1
-        self.slider.pageIndexChanged.connect(self.layout.go_to_page)
-
-        #bottom nav
-        self.bottom_nav.settingsSignal.connect(self.toggleSettings)
-        self.bottom_nav.zoomInSignal.connect(self._zoom_in)
-        self.bottom_nav.zoomOutSignal.connect(self._zoom_out)
-
-        # settings
-        self.settings.viewModeChanged.connect(self.setViewMode)
-        self.settings.fitModeChanged.connect(self.setFitMode)
-        self.settings.zoomStepChanged.connect(self.setZoomSteps)
-        self.settings.pageGapChanged.connect(self.setPageGap)
-        self.settings.autoCropBorderToggled.connect(self.autoCropBorder)
-        self.settings.backgroundColorChanged.connect(self.setBackgroundColor)
-        #navigation settings
-        self.settings.autoScrollChanged.connect(self.autoScroll)
-        self.settings.scrollSensitivityChanged.connect(self.setScrollSensitivity)
-        self.settings.pageSnappingToggled.connect(self.setPageSnap)
-        self.settings.pageTurnAnimationToggled.connect(self.pageTurnAnimation)
-        self.settings.showPageNumToggled.connect(self.showPageNumber)
-        #advance settings
-        self.settings.cacheImageToggled.connect(self.cacheImage)
-        self.settings.smoothScrollToggled.connect(self.setSmoothScroll)
-        self.settings.grayScaleToggled.connect(self.grayScaleImage)
-        self.settings.invertToggled.connect(self.invertImage)
-        self.settings.settingPositionChanged.connect(self.setSettingsPosition)
-        self.settings.settingWidthChanged.connect(self.setSettingsWidth)
-        self.settings.forceHorizontalSliderToggled.connect(self.forceHorizontalSlider)
-
+        self._grabGesture(QScroller.LeftMouseButtonGesture)
 
+    def _grabGesture(self, gesture: QScroller.ScrollerGestureType):
+        """ Grab scroller gesture on viewport unless it was already grabbed"""
+        viewport = self.viewport()
+        key = hash((id(viewport), gesture))
+        if key in self._gestures:
+            return
+        QScroller.grabGesture(viewport, gesture)
+        self._gestures.add(key)
 
+    def _signal_handler(self):
+        if self._connections:
+            # already wired, connecting again would call every slot twice
+            return
+        self._connections = [self.verticalScrollBar().valueChanged.connect(self._onScrollChanged)]
+        for sender, signal, slot in self._WIRING:
+            self._connections.append(getattr(getattr(self, sender), signal).connect(attrgetter(slot)(self)))
 
+    def _disconnect_signals(self):
+        for connection in self._connections:
+            QObject.disconnect(connection)
+        self._connections.clear()
 
     def setNavColor(self, color: QColor):
         self.top_nav.setBackgroundColor(color)
@@ -861,16 +1301,16 @@ class ComicReader(QGraphicsView):
 
     def setTitle(self, title: str):
         self.top_nav.setTitle(title)
+        self._nav_size_dirty = True
+        self._updateNavPosition()
 
     def setDescription(self, description: str):
         self.top_nav.setDescription(description)
+        self._nav_size_dirty = True
+        self._updateNavPosition()
 
     def setViewMode(self, mode: ReadMode):
 #         logger.debug(f"Updating view: {mode}")
-        if mode in [ReadMode.LEFT2RIGHT, ReadMode.RIGHT2LEFT]:
-            self.verticalScrollBar().valueChanged.disconnect(self._onScrollChanged)
-        elif mode in [ReadMode.CONTINUOUS_VERTICAL, ReadMode.CONTINUOUS_VERTICAL_GAPS]:
-            self.verticalScrollBar().valueChanged.connect(self._onScrollChanged)
         self.layout.viewMode = mode
 
     def getViewMode(self):
@@ -880,10 +1320,41 @@ class ComicReader(QGraphicsView):
         pass
 
     def setFitMode(self, mode: FitMode):
+        width = self._decodeWidth(mode)
+        if width != self.lazy_loader.decoder.getMaxWidth():
+            self.lazy_loader.decoder.setMaxWidth(width)
+            self.lazy_loader.reload()
         self.layout.fitMode = mode
 
+    def _decodeWidth(self, mode: FitMode) -> int:
+        """ Widest page needed to fill screen in given fit mode, pages are decoded down to it"""
+        if mode == FitMode.ORIGINAL:
+            return 0
+        screen = QApplication.primaryScreen()
+        return int(screen.availableGeometry().width() * screen.devicePixelRatio())
+
     def setZoomSteps(self, steps: float):
         self.zoom_factor = 1 + steps # .15 = 1.15
+        self._buildZoomLevels()
+
+    def _buildZoomLevels(self):
+        """ Zoom ladder of exact powers of zoom_factor within [min_zoom, max_zoom], always contains 1.0"""
+        factor = max(self.zoom_factor, 1.01)  # log base must be > 1
+        low = math.ceil(math.log(self.min_zoom, factor))
+        high = math.floor(math.log(self.max_zoom, factor))
+        self._zoom_levels = [factor ** k for k in range(low, high + 1)]
+        # keep closest level to current zoom after zoom steps change
+        self._zoom_idx = min(range(len(self._zoom_levels)),
+                             key=lambda i: abs(self._zoom_levels[i] - self.current_scale))
+        self._setZoomIndex(self._zoom_idx, force=True)
+
+    def _setZoomIndex(self, index: int, force: bool = False):
+        index = min(max(index, 0), len(self._zoom_levels) - 1)
+        if index == self._zoom_idx and not force:
+            return
+        self._zoom_idx = index
+        self.current_scale = self._zoom_levels[index]
+        self.setTransform(QTransform.fromScale(self.current_scale, self.current_scale))
 
     def setPageGap(self, gap: int):
         self.layout.pageSpacing = gap
@@ -897,12 +1368,8 @@ class ComicReader(QGraphicsView):
 
     def autoScroll(self, enable: bool, speed: int = 100):
         speed = speed * 100
-        scroller = QScroller.scroller(self.viewport())
-        props = scroller.scrollerProperties()
-        props.setScrollMetric(QScrollerProperties.ScrollMetric.ScrollingCurve, QEasingCurve.Linear)
-        scroller.setScrollerProperties(props)
+        self._auto_anim.stop()
         if not enable:
-            scroller.stop()
             return
 
         # Compute destination and dynamic duration
@@ -915,9 +1382,15 @@ class ComicReader(QGraphicsView):
 
         duration_ms = int((remaining_distance / speed)*1000)  # convert to milliseconds
 
+        if duration_ms <= 0:
+            return
+
         # Scroll to bottom smoothly
         logger.info(f"Duration: {duration_ms} ms")
-        scroller.scrollTo(QPoint(0, max_y), duration_ms)
+        self._auto_anim.setStartValue(current_y)
+        self._auto_anim.setEndValue(max_y)
+        self._auto_anim.setDuration(duration_ms)
+        self._auto_anim.start()
 
 
     def setScrollSensitivity(self, sensitivity: float):
@@ -941,7 +1414,8 @@ class ComicReader(QGraphicsView):
         pass
 
     def cacheImage(self, enabled: bool):
-        pass
+        # decoded pages live in global QPixmapCache, Qt evicts least recently used when over limit
+        QPixmapCache.setCacheLimit(self.PIXMAP_CACHE_LIMIT if enabled else self.PIXMAP_CACHE_LIMIT_DISABLED)
 
     def setSmoothScroll(self, enabled: bool):
 #         logger.debug(f"Updating smooth scroll: {enabled}")
@@ -949,10 +1423,11 @@ class ComicReader(QGraphicsView):
 
         try:
             if enabled:
-                QScroller.grabGesture(viewport, QScroller.LeftMouseButtonGesture)
-                QScroller.grabGesture(viewport, QScroller.MiddleMouseButtonGesture)
+                self._grabGesture(QScroller.LeftMouseButtonGesture)
+                self._grabGesture(QScroller.MiddleMouseButtonGesture)
             else:
-                QScroller.ungrabGesture(self.viewport())
+                QScroller.ungrabGesture(viewport)
+                self._gestures.clear()
         except Exception as e:
             logger.exception(f"Failed to toggle smooth scroll: {e}")
 
@@ -1016,32 +1491,44 @@ class ComicReader(QGraphicsView):
 
 
     def load_cbz(self, cbz_path: Path, current: int = 0):
-        del self.cbz_archive
+        self._page_pool.extend(self.layout.releaseAll())
+        self._closeArchive()
         self.cbz_archive = CBZArchive(cbz_path)
-        load = False
-        for x in range(self.cbz_archive.page_count()):
-            path = self.cbz_archive.get_path(x)
-            if x<=1:
-                load = True
-            else:
-                load = False
-            self.add_page(path, x, load)
-
+        stat = self.cbz_archive.cbz_path.stat()
+        self.lazy_loader.decoder.setCacheNamespace(f"{self.cbz_archive.cbz_path}:{stat.st_size}:{stat.st_mtime_ns}")
+        self.lazy_loader.decoder.setArchive(self.cbz_archive)
         #setting slider total pages
         self.slider.setTotalPages(self.cbz_archive.page_count())
 
+        # placeholder items only, pages are decoded by lazy loader around current page
+        pages = [self.create_page(path, x) for x, path in self.cbz_archive.page_index()]
+        self.layout.addItems(pages)
+        self.lazy_loader.reset(current)
+
+    def _closeArchive(self):
+        """ Detach current archive and close it in a worker, so removing extracted pages doesn't stall gui thread"""
+        archive, self.cbz_archive = self.cbz_archive, None
+        if archive is None:
+            return
+        self.lazy_loader.decoder.clear()
+        self.lazy_loader.decoder.setArchive(None)
+        QThreadPool.globalInstance().start(archive.close)
+
     def add_page(self, page: Union[Path, QUrl], page_index: int, preload: bool = False):
         page = self.create_page(page, page_index)
-        if preload:
-            page.load()
         self.layout.addItem(page)
+        if preload:
+            self.lazy_loader.load_item(page)
 
     def create_page(self, page: Union[Path, QUrl], page_idx: int):
         if isinstance(page, QUrl):
             page = None
             #todo: add it to download queue (and create download queue)
-        page = PagePixmapItem(page, page_idx)
-        return page
+        if self._page_pool:
+            item = self._page_pool.pop()
+            item.reset(page, page_idx)
+            return item
+        return PagePixmapItem(page, page_idx)
 
     def eventFilter(self, obj, event):
         if event.type() == QEvent.Type.Wheel and QApplication.keyboardModifiers() == Qt.ControlModifier:
@@ -1053,30 +1540,19 @@ class ComicReader(QGraphicsView):
         return super().eventFilter(obj, event)
 
     def _zoom_in(self):
-        if self.current_scale < self.max_zoom:
-            self.scale(self.zoom_factor, self.zoom_factor)
-            self.current_scale *= self.zoom_factor
-            self.zoom_widget.setZoom(self.current_scale)
+        self._setZoomIndex(self._zoom_idx + 1)
+        self.zoom_widget.setZoom(self.current_scale)
 
 
     def _zoom_out(self):
-        if self.current_scale > self.min_zoom:
-            self.scale(1 / self.zoom_factor, 1 / self.zoom_factor)
-            self.current_scale /= self.zoom_factor
-            self.zoom_widget.setZoom(self.current_scale)
+        self._setZoomIndex(self._zoom_idx - 1)
+        self.zoom_widget.setZoom(self.current_scale)
 
 
     def keyPressEvent(self, event: QKeyEvent):
-        key = event.key()
-
-        if key == Qt.Key_Left:
-            current = self.lazy_loader.get_current_idx()
-            self.layout.go_left_page(current)  # Left arrow → previous page
-
-        elif key == Qt.Key_Right:
-            current = self.lazy_loader.get_current_idx()
-            self.layout.go_right_page(current)  # Right arrow → next page
-
+        go_to = self._key_map.get(event.key())
+        if go_to is not None:
+            go_to(self.lazy_loader.get_current_idx())
         else:
             # Handle all other keys normally
             super().keyPressEvent(event)
@@ -1092,20 +1568,33 @@ class ComicReader(QGraphicsView):
 
     def resizeEvent(self, event: QResizeEvent):
         super().resizeEvent(event)
-        self.zoom_widget.move((self.width() - self.zoom_widget.width())//2, 0)
+        self._resize_timer.start()
 
-        self._updateNavPosition()
-        self._updateSliderPosition()
-        self._updateSettingPosition()
+    def _applyLayout(self):
+        """ Reposition overlays after resize, runs once per debounced burst of resize events"""
+        # overlays are moved together, repaint once at the end
+        self.setUpdatesEnabled(False)
+        try:
+            self.zoom_widget.move((self.width() - self.zoom_widget.width())//2, 0)
+
+            self._updateNavPosition()
+            self._updateSliderPosition()
+            self._updateSettingPosition()
+        finally:
+            self.setUpdatesEnabled(True)
+            self.update()
 
     def _updateNavPosition(self):
-        self.top_nav.adjustSize()
-        self.top_nav.setFixedSize(self.width(), self.top_nav.height())
+        if self._nav_size_dirty:
+            self._top_nav_height = self.top_nav.sizeHint().height()
+            self._bottom_nav_height = self.bottom_nav.sizeHint().height()
+            self._nav_size_dirty = False
+
+        self.top_nav.setFixedSize(self.width(), self._top_nav_height)
         self.top_nav.move(0, 0)
 
-        self.bottom_nav.adjustSize()
-        self.bottom_nav.setFixedSize(self.width(), self.bottom_nav.height())
-        self.bottom_nav.move(0, self.height() - self.bottom_nav.height())
+        self.bottom_nav.setFixedSize(self.width(), self._bottom_nav_height)
+        self.bottom_nav.move(0, self.height() - self._bottom_nav_height)
 
     def _updateSettingPosition(self, force=False):
         if not self.settings.isVisible() and not force:
@@ -1128,9 +1617,9 @@ class ComicReader(QGraphicsView):
 
         if self.slider.getOrientation() == Qt.Vertical:
             slider_width = self.slider.slider_v.width() + 20
-            slider_height = self.height() - self.top_nav.height() - self.bottom_nav.height()
+            slider_height = self.height() - self._top_nav_height - self._bottom_nav_height
             x = self.width() - slider_width - 20
-            y = self.top_nav.height()
+            y = self._top_nav_height
 
             self.slider.setFixedSize(slider_width, slider_height)
             self.slider.move(x, y)
@@ -1138,14 +1627,15 @@ class ComicReader(QGraphicsView):
         else:  # Horizontal
             slider_height = self.slider.slider_h.height() + 20
             x = 0
-            y = self.height() - slider_height - self.bottom_nav.height() - 20
+            y = self.height() - slider_height - self._bottom_nav_height - 20
 
             self.slider.setFixedSize(self.width(), slider_height)
             self.slider.move(x, y)
 
 
     def closeEvent(self, event: QCloseEvent):
-        del self.cbz_archive
+        self._disconnect_signals()
+        self._closeArchive()
 
         super().closeEvent(event)
 
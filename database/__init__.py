@@ -1,7 +1,9 @@
 from .convert import *
 from .models import (Anime, Manga, Genre, Tag, Trailer, UserCategory, RelationType, UserLibrary, User, UserProfile,
     Format, SourceMaterial, Season, Status, Studio, Episode, WatchHistory, sync_init_db, init_db, drop_all_tables,
-                    populate_reference_tables)
+                    populate_reference_tables, create_app_engine, pool_stats, warm_pool, seed_reference_data, make_session_factory,
+                    strict_load, count_queries, ANIME_LIST_OPTIONS, MANGA_LIST_OPTIONS, ANIME_DETAIL_OPTIONS,
+                    MANGA_DETAIL_OPTIONS, load_character_full, populate_character_media, search_filter)
 
 from .repo import AsyncLibraryRepository, AsyncMediaRepository, get_user, update_user, create_user, SortBy, SortOrder, \
     verify_login_token
\ No newline at end of file
@@ -1,24 +1,34 @@
-import json
+import threading
+from functools import lru_cache
+from types import MappingProxyType
 from datetime import datetime
-from enum import EnumType, Enum
-from typing import Union, List, Dict, Type, Optional
+from enum import Enum
+from typing import Union, List, Dict, Type, Optional, Mapping, TYPE_CHECKING
 
-from pywin.dialogs import status
+from AnillistPython import AnilistMedia, AnilistTag, AnilistStudio, AnilistCharacter, MediaSeason, MediaStatus, \
+    MediaSource, MediaFormat, MediaType, MediaGenre, MediaRelation
+from AnillistPython.models import CharacterRole
 
-from AnillistPython import AnilistMedia, AnilistTitle, AnilistTag, AnilistStudio, AnilistCharacter, AnilistScore, \
-    AnilistMediaInfo, MediaSeason, MediaStatus, MediaSource, MediaFormat, AnilistMediaCharacter, MediaType, MediaGenre, \
-    MediaRelation
-from AnillistPython.models import CharacterRole, AnilistStudio
-from AnillistPython.models.media import AnilistMediaTrailer, MediaCoverImage
+if TYPE_CHECKING:
+    # annotation only, media submodule is not needed at import time
+    from AnillistPython.models.media import AnilistMediaTrailer
 from database.models import Anime, Manga, Tag, Studio, Trailer, Character, MediaCharacter, Genre, Format, Status, \
-    Season, SourceMaterial, CharacterRole as DbCharacterRole, RelationType as RelationType
+    Season, SourceMaterial, CharacterRole as DbCharacterRole, RelationType as RelationType, anime_genre_association, \
+    manga_genre_association, anime_tag_association, manga_tag_association, anime_studio_association, \
+    manga_studio_association
+
+try:
+    from orjson import loads as _json_loads
+except ImportError:  # orjson is optional, stdlib json also accepts utf-8 bytes
+    from json import loads as _json_loads
 
 tags_data: List[Dict] = []
 
 def read_tag(tag_path: str):
     global tags_data
-    with open(tag_path, "r", encoding="utf-8") as f:
-        tags_data = json.load(f)
+    # raw bytes, decoded by the json parser itself (orjson when installed)
+    with open(tag_path, "rb") as f:
+        tags_data = _json_loads(f.read())
 
 
 
@@ -108,6 +118,27 @@ media_enum_to_index = {
     }
 }
 
+# read only lookup tables, the indexes are stored in the database and must not change at runtime
+media_enum_to_index: Dict[Type[Enum], Mapping[Enum, int]] = {
+    enum_class: MappingProxyType(enum_map) for enum_class, enum_map in media_enum_to_index.items()
+}
+
+# inverse of media_enum_to_index (index -> enum) for get_index_enum, built once at import
+media_index_to_enum: Dict[Type[Enum], Mapping[int, Enum]] = {
+    enum_class: MappingProxyType({idx: enum_value for enum_value, idx in enum_map.items()})
+    for enum_class, enum_map in media_enum_to_index.items()
+}
+
+# attach index to the enum members themselves for trusted internal callers (`_idx`), one attribute load per
+# lookup and no clash between equal valued members of different enums (MediaFormat.MANGA, MediaSource.MANGA)
+for _enum_map in media_enum_to_index.values():
+    for _enum_value, _index in _enum_map.items():
+        setattr(_enum_value, "_db_index", _index)
+del _enum_map, _enum_value, _index
+
+def _idx(enum_value: Optional[Enum]) -> Optional[int]:
+    """Unchecked `get_enum_index`, returns None for None or unknown values."""
+    return getattr(enum_value, "_db_index", None)
 
 def get_enum_index(enum_class: type[Enum], enum_value: Enum) -> int | None:
     """
@@ -128,7 +159,8 @@ def get_enum_index(enum_class: type[Enum], enum_value: Enum) -> int | None:
     if not isinstance(enum_value, enum_class):
         raise TypeError(f"enum_value must be an instance of {enum_class}, got {type(enum_value)}")
 
-    return media_enum_to_index.get(enum_class, {}).get(enum_value)
+    # value is a checked member of enum_class, its index is attached to it
+    return _idx(enum_value)
 
 def get_index_enum(enum_class: type[Enum], enum_idx: int) -> Enum | None:
     """
@@ -148,25 +180,18 @@ def get_index_enum(enum_class: type[Enum], enum_idx: int) -> Enum | None:
     if not isinstance(enum_class, type) or not issubclass(enum_class, Enum):
         raise TypeError(f"enum_class must be a subclass of Enum, got {enum_class}")
 
-    enum_map = media_enum_to_index.get(enum_class)
-    if not enum_map:
-        return None
-
-    # Reverse lookup: index → enum
-    for enum_value, idx in enum_map.items():
-        if idx == enum_idx:
-            return enum_value
-
-    return None
+    return media_index_to_enum.get(enum_class, {}).get(enum_idx)
 
 
 
 
+# not interned: Genre.animes/mangas back_populate, a shared instance would collect every converted media and
+# cascade them into whichever session adds one of them. Reference row values are cached by `_reference_values`.
 def anilist_to_genre(genre: MediaGenre) -> Genre:
     if genre is None:
         return None
     return Genre(
-        id=get_enum_index(MediaGenre, genre),
+        id=_idx(genre),
         name=genre.value,
     )
 
@@ -175,7 +200,7 @@ def anilist_to_format(format: MediaFormat):
     if not format:
         return None
     return Format(
-        id = get_enum_index(MediaFormat, format),
+        id = _idx(format),
         name = format.value,
     )
 
@@ -183,7 +208,7 @@ def anilist_to_status(status: MediaStatus):
     if not status:
         return None
     return Status(
-        id = get_enum_index(MediaStatus, status),
+        id = _idx(status),
         name = status.value,
     )
 
@@ -191,7 +216,7 @@ def anilist_to_season(season: MediaSeason):
     if not season:
         return None
     return Season(
-        id = get_enum_index(MediaSeason, season),
+        id = _idx(season),
         name = season.value,
     )
 
@@ -199,7 +224,7 @@ def anilist_to_source(source: MediaSource):
     if not source:
         return None
     return SourceMaterial(
-        id = get_enum_index(MediaSource, source),
+        id = _idx(source),
         name = source.value,
     )
 
@@ -207,7 +232,7 @@ def anilist_to_character_role(character_role: CharacterRole):
     if not character_role:
         return None
     return DbCharacterRole(
-        id = get_enum_index(CharacterRole, character_role),
+        id = _idx(character_role),
         name = character_role.value,
     )
 
@@ -215,30 +240,68 @@ def anilist_to_relation_type(relation_type: MediaRelation):
     if not relation_type:
         return None
     return RelationType(
-        id = get_enum_index(MediaRelation, relation_type),
+        id = _idx(relation_type),
         name = relation_type.value,
     )
 
+_REFERENCE_CONVERTERS = {
+    MediaGenre: anilist_to_genre,
+    MediaFormat: anilist_to_format,
+    MediaStatus: anilist_to_status,
+    MediaSeason: anilist_to_season,
+    MediaSource: anilist_to_source,
+    CharacterRole: anilist_to_character_role,
+    MediaRelation: anilist_to_relation_type,
+}
+
+@lru_cache(maxsize=None)
+def _reference_values(enum_class: Type[Enum]) -> tuple:
+    """
+    Model and column values of the reference rows for every member of enum_class, converted on first use.
+
+    Plain values are cached, not ORM instances: a cached instance would be shared by every caller and expired
+    or detached by whichever session it was added to.
+    """
+    convert = _REFERENCE_CONVERTERS[enum_class]
+    references = [convert(member) for member in enum_class]
+    model = type(references[0])
+    keys = [column.key for column in model.__table__.columns]
+    return model, tuple(tuple((key, getattr(ref, key)) for key in keys) for ref in references)
+
+def _all_references(enum_class: Type[Enum]) -> list:
+    """New (transient) reference rows for every member of enum_class, built from the cached values."""
+    model, rows = _reference_values(enum_class)
+    return [model(**dict(row)) for row in rows]
+
+def reference_rows() -> Dict[str, List[dict]]:
+    """Column values of every enum backed reference row, keyed by table name (for multi row inserts)."""
+    rows = {}
+    for enum_class in _REFERENCE_CONVERTERS:
+        model, values = _reference_values(enum_class)
+        rows[model.__tablename__] = [dict(row) for row in values]
+    return rows
+
+# getters build new instances on every call, callers are free to add them to a session
 def get_all_genres() -> List[Genre]:
-    return [anilist_to_genre(genre) for genre in MediaGenre]
+    return _all_references(MediaGenre)
 
 def get_all_formats() -> List[Format]:
-    return [anilist_to_format(format) for format in MediaFormat]
+    return _all_references(MediaFormat)
 
 def get_all_statuses() -> List[Status]:
-    return [anilist_to_status(status) for status in MediaStatus]
+    return _all_references(MediaStatus)
 
 def get_all_seasons() -> List[Season]:
-    return [anilist_to_season(season) for season in MediaSeason]
+    return _all_references(MediaSeason)
 
 def get_all_sources() -> List[SourceMaterial]:
-    return [anilist_to_source(source) for source in MediaSource]
+    return _all_references(MediaSource)
 
 def get_all_character_roles() -> List[DbCharacterRole]:
-    return [anilist_to_character_role(character_role) for character_role in CharacterRole]
+    return _all_references(CharacterRole)
 
 def get_all_relation_types() -> List[RelationType]:
-    return [anilist_to_relation_type(relation) for relation in MediaRelation]
+    return _all_references(MediaRelation)
 
 def anilist_to_tags(data: AnilistTag):
     return Tag(
@@ -255,7 +318,7 @@ def anilist_to_studio(data: AnilistStudio):
         name = data.name,
     )
 
-def anilist_to_trailer(data: AnilistMediaTrailer):
+def anilist_to_trailer(data: "AnilistMediaTrailer"):
     return Trailer(
         video_id = data.video_id,
         site = data.site,
@@ -263,97 +326,275 @@ def anilist_to_trailer(data: AnilistMediaTrailer):
     )
 
 def anilist_to_character(data: AnilistCharacter):
+    name = data.name
+    if name is None:
+        name_native = display_name = None
+    else:
+        name_native = name.native
+        display_name = name.romaji or name.english
     return Character(
         id = data.id,
         description = data.description,
         age = data.age,
         dob = data.dob,
         image=data.image,
-        name_native= data.name.native if data.name else None,
-        name = (data.name.romaji or data.name.english) if data.name else None,
+        name_native=name_native,
+        name=display_name,
     )
 
 def link_character(character: Union[Character, AnilistCharacter], media_type: MediaType, media_id: int):
-    if isinstance(character, AnilistCharacter):
+    # Character is a mapped model without subclasses, exact type check is enough
+    if type(character) is not Character:
         character = anilist_to_character(character)
+    is_anime = media_type == MediaType.ANIME
+    return link_character_fast(character, media_id if is_anime else None, None if is_anime else media_id)
+
+def link_character_fast(character: Character, anime_id: Optional[int] = None,
+                        manga_id: Optional[int] = None) -> MediaCharacter:
+    """Link an already converted Character, skips the type and media type dispatch of `link_character`."""
     return MediaCharacter(
-        character_id = character.id,
+        character_id=character.id,
         character=character,
-        anime_id= media_id if media_type == MediaType.ANIME else None,
-        manga_id=media_id if media_type == MediaType.MANGA else None,
+        anime_id=anime_id,
+        manga_id=manga_id,
     )
 
-def extract_common_media_fields(data: AnilistMedia) -> dict:
-    title = data.title or {}
-    score = data.score or {}
-    info = data.info or {}
-    studios = data.studios or []
-    genres = data.genres or []
-    tags = data.tags or []
+def _link_characters(characters: List[AnilistCharacter], anime_id: Optional[int] = None,
+                     manga_id: Optional[int] = None) -> List[MediaCharacter]:
+    """Convert and link characters of one media in a single pass, media type is decided once by the caller."""
+    links = []
+    append = links.append
+    for character in characters:
+        if character is None:
+            continue
+        character = anilist_to_character(character)
+        append(MediaCharacter(character_id=character.id, character=character, anime_id=anime_id, manga_id=manga_id))
+    return links
 
-    cover_image = data.coverImage or {}
+def media_column_values(data: AnilistMedia, fields: Optional[dict] = None) -> dict:
+    """
+    Column values shared by Anime and Manga rows, plain values only (usable for ORM and Core inserts).
 
-    return {
-        "id": data.id,
-
-        "title_english": title.english if title else None,
-        "title_romaji": title.romaji if title else None,
-        "title_native": title.native if title else None,
-
-        "description": data.description,
-
-        "cover_image_extra_large": cover_image.extraLarge if cover_image else None,
-        "cover_image_large": cover_image.large if cover_image else None,
-        "cover_image_medium": cover_image.medium if cover_image else None,
-        "cover_image_color": cover_image.color if cover_image else None,
-        "banner_image": data.bannerImage,
-
-        "status_id": get_enum_index(type(info.status), info.status) if status else None,
-        "format_id": get_enum_index(type(info.format), info.format) if info else None,
-        "season_id": get_enum_index(type(info.season), info.season) if info else None,
-        "source_material_id": get_enum_index(type(info.source), info.source) if info else None,
-
-        "synonyms": data.synonyms or [],
-        "start_date": data.startDate,
-        "end_date": data.endDate,
-        "average_score": score.average_score if score else None,
-        "mean_score": score.mean_score if score else None,
-        "popularity": score.popularity if score else None,
-        "favourites": score.favourites if score else None,
-        "isAdult": data.isAdult or False,
-        "site_url": data.siteUrl,
-        "idMal": data.idMal,
-        "tags": filter_none_values([anilist_to_tags(tag) for tag in tags]),
-        "trailers": filter_none_values([anilist_to_trailer(data.trailer)] if data.trailer else None),
-        "studios": filter_none_values([anilist_to_studio(studio) for studio in studios]),
-        "genres": filter_none_values([anilist_to_genre(genre) for genre in genres]),
-    }
+    Args:
+        data: Anilist media record.
+        fields: Dict to fill (cleared first) instead of allocating a new one.
+    """
+    # bind attributes once and test each optional part once against None, instead of once per field
+    # (no `or {}` fallback, a plain dict has none of the attributes read below)
+    title = data.title
+    score = data.score
+    info = data.info
+    cover_image = data.coverImage
+
+    if fields is None:
+        fields = {}
+    else:
+        fields.clear()
+    fields["id"] = data.id
+    fields["description"] = data.description
+    fields["banner_image"] = data.bannerImage
+    fields["synonyms"] = data.synonyms or []
+    fields["start_date"] = data.startDate
+    fields["end_date"] = data.endDate
+    fields["isAdult"] = data.isAdult or False
+    fields["site_url"] = data.siteUrl
+    fields["idMal"] = data.idMal
+
+    if title is not None:
+        fields["title_english"] = title.english
+        fields["title_romaji"] = title.romaji
+        fields["title_native"] = title.native
+    else:
+        fields["title_english"] = fields["title_romaji"] = fields["title_native"] = None
+
+    if cover_image is not None:
+        fields["cover_image_extra_large"] = cover_image.extraLarge
+        fields["cover_image_large"] = cover_image.large
+        fields["cover_image_medium"] = cover_image.medium
+        fields["cover_image_color"] = cover_image.color
+    else:
+        fields["cover_image_extra_large"] = fields["cover_image_large"] = None
+        fields["cover_image_medium"] = fields["cover_image_color"] = None
+
+    if info is not None:
+        fields["status_id"] = _idx(info.status)
+        fields["format_id"] = _idx(info.format)
+        fields["season_id"] = _idx(info.season)
+        fields["source_material_id"] = _idx(info.source)
+    else:
+        fields["status_id"] = fields["format_id"] = fields["season_id"] = fields["source_material_id"] = None
+
+    if score is not None:
+        fields["average_score"] = score.average_score
+        fields["mean_score"] = score.mean_score
+        fields["popularity"] = score.popularity
+        fields["favourites"] = score.favourites
+    else:
+        fields["average_score"] = fields["mean_score"] = fields["popularity"] = fields["favourites"] = None
+    return fields
+
+
+# per thread scratch dict for extract_common_media_fields, its result only lives until Model(**fields) copies it
+_scratch = threading.local()
+
+def extract_common_media_fields(data: AnilistMedia) -> dict:
+    """
+    Column values and relationship collections for an Anime/Manga constructor.
+
+    The returned dict is reused by the next call on the same thread, copy it if it has to be kept.
+    """
+    trailer = data.trailer
+    studios = data.studios
+    genres = data.genres
+    tags = data.tags
+
+    fields = getattr(_scratch, "fields", None)
+    if fields is None:
+        fields = _scratch.fields = {}
+    media_column_values(data, fields)
+    # relationship collections are only set when non empty, ORM creates empty ones lazily on access
+    if tags:
+        fields["tags"] = [anilist_to_tags(tag) for tag in tags if tag is not None]
+    if trailer:
+        fields["trailers"] = [anilist_to_trailer(trailer)]
+    if studios:
+        fields["studios"] = [anilist_to_studio(studio) for studio in studios if studio is not None]
+    if genres:
+        fields["genres"] = [anilist_to_genre(genre) for genre in genres if genre is not None]
+    return fields
 
 
 def anilist_to_anime(data: AnilistMedia) -> Anime:
-    characters = data.characters or []
-    genres = data.genres or []
+    characters = data.characters
     fields = extract_common_media_fields(data)
     fields.update({
         "episodes": data.episodes,
         "duration": data.duration,
-        "media_character_links": filter_none_values([link_character(character, MediaType.ANIME, data.id) for character in characters])
     })
+    if characters:
+        fields["media_character_links"] = _link_characters(characters, anime_id=data.id)
     return Anime(**fields)
     # anime.genres.extend(filter_none_values([anilist_to_genre(genre) for genre in genres]))
 
 
 
 def anilist_to_manga(data: AnilistMedia) -> Manga:
-    characters = data.characters or []
+    characters = data.characters
     fields = extract_common_media_fields(data)
     fields.update({
         "chapters": data.chapters,
         "volumes": data.volumes,
-        "media_character_links": filter_none_values([link_character(character, MediaType.MANGA, data.id) for character in characters])
     })
+    if characters:
+        fields["media_character_links"] = _link_characters(characters, manga_id=data.id)
     return Manga(**fields)
 
+def anilist_to_media_rows(records: List[AnilistMedia], media_type: MediaType) -> Dict[str, List[dict]]:
+    """
+    Convert Anilist records into plain row dicts for bulk Core inserts (executemany),
+    skipping ORM object construction entirely.
+
+    Args:
+        records: Anilist media records of a single media type.
+        media_type: MediaType.ANIME or MediaType.MANGA.
+
+    Returns:
+        Rows keyed by table name. Reference rows (genres, tags, studios, characters)
+        are de-duplicated by id across records.
+    """
+    is_anime = media_type == MediaType.ANIME
+    media_key = "anime_id" if is_anime else "manga_id"
+    genre_table, tag_table, studio_table = (
+        (anime_genre_association, anime_tag_association, anime_studio_association) if is_anime
+        else (manga_genre_association, manga_tag_association, manga_studio_association)
+    )
+
+    media_rows: List[dict] = []
+    genres: set = set()  # genre members seen, reference rows are built once after the pass
+    tags: Dict[int, dict] = {}
+    studios: Dict[int, dict] = {}
+    characters: Dict[int, dict] = {}
+    genre_links: List[dict] = []
+    tag_links: List[dict] = []
+    studio_links: List[dict] = []
+    trailers: List[dict] = []
+    character_links: List[dict] = []
+
+    for data in records:
+        media_id = data.id
+        row = media_column_values(data)
+        if is_anime:
+            row["episodes"] = data.episodes
+            row["duration"] = data.duration
+        else:
+            row["chapters"] = data.chapters
+            row["volumes"] = data.volumes
+        media_rows.append(row)
+
+        for genre in data.genres or ():
+            if genre is None:
+                continue
+            genres.add(genre)
+            genre_links.append({media_key: media_id, "genre_id": _idx(genre)})
+
+        # reference rows are shared by many records, build each one only the first time it is seen
+        for tag in data.tags or ():
+            if tag is None:
+                continue
+            tag_id = tag.id
+            if tag_id not in tags:
+                tags[tag_id] = {"id": tag_id, "name": tag.name, "category": tag.category, "isAdult": tag.isAdult,
+                                "description": tag.description or ""}
+            tag_links.append({media_key: media_id, "tag_id": tag_id})
+
+        for studio in data.studios or ():
+            if studio is None:
+                continue
+            studio_id = studio.id
+            if studio_id not in studios:
+                studios[studio_id] = {"id": studio_id, "name": studio.name}
+            studio_links.append({media_key: media_id, "studio_id": studio_id})
+
+        trailer = data.trailer
+        if trailer:
+            trailers.append({media_key: media_id, "video_id": trailer.video_id, "site": trailer.site,
+                             "thumbnail": trailer.thumbnail})
+
+        for character in data.characters or ():
+            if character is None:
+                continue
+            character_id = character.id
+            if character_id not in characters:
+                name = character.name
+                if name is None:
+                    name_native = name_display = None
+                else:
+                    name_native, name_display = name.native, name.romaji or name.english
+                characters[character_id] = {
+                    "id": character_id,
+                    "description": character.description,
+                    "age": character.age,
+                    "dob": character.dob,
+                    "image": character.image,
+                    "name_native": name_native,
+                    "name": name_display,
+                }
+            character_links.append({media_key: media_id, "character_id": character_id})
+
+    return {
+        Genre.__tablename__: [{"id": _idx(genre), "name": genre.value} for genre in genres],
+        Tag.__tablename__: list(tags.values()),
+        Studio.__tablename__: list(studios.values()),
+        Character.__tablename__: list(characters.values()),
+        (Anime if is_anime else Manga).__tablename__: media_rows,
+        genre_table.name: genre_links,
+        tag_table.name: tag_links,
+        studio_table.name: studio_links,
+        Trailer.__tablename__: trailers,
+        MediaCharacter.__tablename__: character_links,
+    }
+
+
 def filter_none_values(data: list) -> list:
     if data is None:
         return []
@@ -362,6 +603,8 @@ def filter_none_values(data: list) -> list:
 
 if __name__ == '__main__':
     from pprint import pprint
+    from AnillistPython import AnilistTitle, AnilistScore, AnilistMediaInfo
+    from AnillistPython.models.media import AnilistMediaTrailer, MediaCoverImage
     sample_title = AnilistTitle(
         romaji="Shingeki no Kyojin",
         english="Attack on Titan",
@@ -1,83 +1,123 @@
+import asyncio
 import os
-from datetime import datetime, timezone
-from typing import List, Optional, TypeVar
+import warnings
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional, TypeVar, Union, Iterator
 
 from loguru import logger
-from sqlalchemy import Engine, event, create_engine
-from sqlalchemy.exc import SQLAlchemyError, IntegrityError
-from sqlalchemy.ext.asyncio import AsyncAttrs, AsyncEngine, AsyncSession
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
+from sqlalchemy import Engine, event, create_engine, make_url, func, text, or_, select, literal_column, inspect
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError, SAWarning
+from sqlalchemy.ext.asyncio import AsyncAttrs, AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship, raiseload, configure_mappers, Session, \
+    selectinload, joinedload, undefer_group
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.sql import Select
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlalchemy.schema import Table, ForeignKey, Column, CheckConstraint, UniqueConstraint, Index
-from sqlalchemy.types import String, Boolean, Integer, Text, DateTime, Date, JSON
+from sqlalchemy.types import String, Boolean, Integer, SmallInteger, Text, DateTime, Date, JSON
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 
 class Base(AsyncAttrs, DeclarativeBase):
+    # mapped classes keep a per instance __dict__ (ORM instrumentation stores attribute state there), so no
+    # __slots__ or slotted dataclasses on models. For bulk ingest skip ORM objects: see convert.anilist_to_media_rows
     pass
 
 
+def _index_not_null(name: str, column: str, *columns: str) -> Index:
+    """
+    Partial index over the rows where column is set. For the anime_id/manga_id style pairs, where one of
+    the two is NULL on every row, so a full index would store the other half of the table as NULL keys.
+    Lookups by value (=, IN) imply IS NOT NULL, SQLite and PostgreSQL both use the partial index for them.
+    """
+    where = text(f"{column} IS NOT NULL")
+    return Index(name, column, *columns, sqlite_where=where, postgresql_where=where)
+
+
 # Association Tables
+# the primary key covers media -> reference lookups, the reverse index reference -> media ones (genre/tag browsing,
+# Character.animes). Two integer columns and no other payload, so SQLite stores them WITHOUT ROWID: the table
+# is the primary key b-tree itself instead of a rowid table plus a separate primary key index.
 anime_tag_association = Table(
     "anime_tag_association",
     Base.metadata,
     Column("anime_id", ForeignKey("anime.id"), primary_key=True),
-    Column("tag_id", ForeignKey("tags.id"), primary_key=True)
+    Column("tag_id", ForeignKey("tags.id"), primary_key=True),
+    Index("ix_anime_tag_reverse", "tag_id", "anime_id"),
+    sqlite_with_rowid=False
 )
 
 manga_tag_association = Table(
     "manga_tag_association",
     Base.metadata,
     Column("manga_id", ForeignKey("manga.id"), primary_key=True),
-    Column("tag_id", ForeignKey("tags.id"), primary_key=True)
+    Column("tag_id", ForeignKey("tags.id"), primary_key=True),
+    Index("ix_manga_tag_reverse", "tag_id", "manga_id"),
+    sqlite_with_rowid=False
 )
 
 anime_genre_association = Table(
     "anime_genre_association",
     Base.metadata,
     Column("anime_id", ForeignKey("anime.id"), primary_key=True),
-    Column("genre_id", ForeignKey("genres.id"), primary_key=True)
+    Column("genre_id", ForeignKey("genres.id"), primary_key=True),
+    Index("ix_anime_genre_reverse", "genre_id", "anime_id"),
+    sqlite_with_rowid=False
 )
 
 manga_genre_association = Table(
     "manga_genre_association",
     Base.metadata,
     Column("manga_id", ForeignKey("manga.id"), primary_key=True),
-    Column("genre_id", ForeignKey("genres.id"), primary_key=True)
+    Column("genre_id", ForeignKey("genres.id"), primary_key=True),
+    Index("ix_manga_genre_reverse", "genre_id", "manga_id"),
+    sqlite_with_rowid=False
 )
 
 anime_studio_association = Table(
     "anime_studio_association",
     Base.metadata,
     Column("anime_id", ForeignKey("anime.id"), primary_key=True),
-    Column("studio_id", ForeignKey("studios.id"), primary_key=True)
+    Column("studio_id", ForeignKey("studios.id"), primary_key=True),
+    Index("ix_anime_studio_reverse", "studio_id", "anime_id"),
+    sqlite_with_rowid=False
 )
 
 manga_studio_association = Table(
     "manga_studio_association",
     Base.metadata,
     Column("manga_id", ForeignKey("manga.id"), primary_key=True),
-    Column("studio_id", ForeignKey("studios.id"), primary_key=True)
+    Column("studio_id", ForeignKey("studios.id"), primary_key=True),
+    Index("ix_manga_studio_reverse", "studio_id", "manga_id"),
+    sqlite_with_rowid=False
 )
 
 anime_character_association = Table(
     "anime_character_association",
     Base.metadata,
     Column("anime_id", ForeignKey("anime.id"), primary_key=True),
-    Column("character_id", ForeignKey("characters.id"), primary_key=True)
+    Column("character_id", ForeignKey("characters.id"), primary_key=True),
+    Index("ix_anime_character_reverse", "character_id", "anime_id"),
+    sqlite_with_rowid=False
 )
 
 manga_character_association = Table(
     "manga_character_association",
     Base.metadata,
     Column("manga_id", ForeignKey("manga.id"), primary_key=True),
-    Column("character_id", ForeignKey("characters.id"), primary_key=True)
+    Column("character_id", ForeignKey("characters.id"), primary_key=True),
+    Index("ix_manga_character_reverse", "character_id", "manga_id"),
+    sqlite_with_rowid=False
 )
 
 library_category = Table(
     'library_category',
     Base.metadata,
     Column('library_id', Integer, ForeignKey('user_libraries.id'), primary_key=True),
-    Column('category_id', Integer, ForeignKey('user_categories.id'), primary_key=True)
+    Column('category_id', Integer, ForeignKey('user_categories.id'), primary_key=True),
+    Index("ix_library_category_reverse", "category_id", "library_id"),
+    sqlite_with_rowid=False
 )
 
 
@@ -88,7 +128,7 @@ class User(Base):
     name: Mapped[str] = mapped_column(String, unique=True)
     email: Mapped[str] = mapped_column(String, nullable=True)
     password_hash: Mapped[str] = mapped_column(String)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
     token: Mapped[str] = mapped_column(String, nullable=True)
 
     categories: Mapped[List["UserCategory"]] = relationship("UserCategory", back_populates="user")
@@ -239,18 +279,20 @@ class Trailer(Base):
     __tablename__ = 'trailers'
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    anime_id: Mapped[Optional[int]] = mapped_column(ForeignKey('anime.id'), nullable=True, index=True)
-    manga_id: Mapped[Optional[int]] = mapped_column(ForeignKey('manga.id'), nullable=True, index=True)
+    anime_id: Mapped[Optional[int]] = mapped_column(ForeignKey('anime.id'), nullable=True)
+    manga_id: Mapped[Optional[int]] = mapped_column(ForeignKey('manga.id'), nullable=True)
     site: Mapped[str] = mapped_column(String)  # e.g., "YouTube"
     video_id: Mapped[str] = mapped_column(String)  # e.g., YouTube video ID
     thumbnail: Mapped[Optional[str]] = mapped_column(String)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     anime: Mapped[Optional['Anime']] = relationship("Anime", back_populates="trailers")
     manga: Mapped[Optional['Manga']] = relationship("Manga", back_populates="trailers")
 
     __table_args__ = (
         CheckConstraint('anime_id IS NOT NULL OR manga_id IS NOT NULL', name='check_media_id'),
+        _index_not_null("ix_trailers_anime_id", "anime_id"),
+        _index_not_null("ix_trailers_manga_id", "manga_id"),
     )
 
 
@@ -268,6 +310,7 @@ class Character(Base):
 
     media_character_links: Mapped[List["MediaCharacter"]] = relationship("MediaCharacter", back_populates="character")
 
+    # viewonly shortcuts over media_characters, not a primary load path: see load_character_full
     animes: Mapped[List["Anime"]] = relationship(
         "Anime",
         secondary="media_characters",
@@ -292,7 +335,8 @@ class MediaCharacter(Base):
     manga_id: Mapped[Optional[int]] = mapped_column(ForeignKey("manga.id"), nullable=True)
     character_id: Mapped[int] = mapped_column(ForeignKey("characters.id"), nullable=False)
 
-    role: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # CharacterRole enum index (see convert.get_index_enum), an integer instead of the role name per link row
+    role_id: Mapped[Optional[int]] = mapped_column(ForeignKey("character_roles.id"), nullable=True)
 
     character: Mapped["Character"] = relationship("Character", back_populates="media_character_links")
     anime: Mapped[Optional["Anime"]] = relationship("Anime", back_populates="media_character_links")
@@ -303,6 +347,9 @@ class MediaCharacter(Base):
             "(anime_id IS NOT NULL AND manga_id IS NULL) OR (anime_id IS NULL AND manga_id IS NOT NULL)",
             name="chk_one_media_id_not_null"
         ),
+        # cast of a media (optionally by role), also serves the character link loads by media id
+        _index_not_null("ix_media_characters_anime_role", "anime_id", "role_id"),
+        _index_not_null("ix_media_characters_manga_role", "manga_id", "role_id"),
     )
 
 
@@ -345,7 +392,7 @@ class UserCategory(Base):
     hidden: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     is_deletable = Column(Boolean, default=True, nullable=False)
     position = Column(Integer, nullable=False, default=-1)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     user_id: Mapped[int] = mapped_column(ForeignKey("user.id"), index=True)
     user: Mapped["User"] = relationship("User", back_populates="categories")
@@ -363,12 +410,12 @@ class UserLibrary(Base):
     __tablename__ = "user_libraries"
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("user.id"), nullable=False, index=True)
-    anime_id: Mapped[int] = mapped_column(ForeignKey("anime.id"), nullable=True, index=True)
-    manga_id: Mapped[int] = mapped_column(ForeignKey("manga.id"), nullable=True, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("user.id"), nullable=False)
+    anime_id: Mapped[int] = mapped_column(ForeignKey("anime.id"), nullable=True)
+    manga_id: Mapped[int] = mapped_column(ForeignKey("manga.id"), nullable=True)
     status_id: Mapped[int] = mapped_column(ForeignKey("status.id"), nullable=True)
     progress: Mapped[int] = mapped_column(Integer, default=0)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     user: Mapped["User"] = relationship("User", back_populates="library_entries")
     anime: Mapped["Anime"] = relationship("Anime")
@@ -384,6 +431,11 @@ class UserLibrary(Base):
 
     __table_args__ = (
         CheckConstraint('anime_id IS NOT NULL OR manga_id IS NOT NULL', name='check_media_id'),
+        # one entry per user and media, user_id prefix also serves the per user library scans
+        Index("ix_user_libraries_user_anime", "user_id", "anime_id", unique=True),
+        Index("ix_user_libraries_user_manga", "user_id", "manga_id", unique=True),
+        _index_not_null("ix_user_libraries_anime_id", "anime_id"),
+        _index_not_null("ix_user_libraries_manga_id", "manga_id"),
     )
 
 
@@ -391,15 +443,15 @@ class WatchHistory(Base):
     """Represents a WatchHistory of user."""
     __tablename__ = 'watch_history'
     id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey('user.id'), index=True)
-    anime_id: Mapped[Optional[int]] = mapped_column(ForeignKey('anime.id'), nullable=True, index=True)
-    manga_id: Mapped[Optional[int]] = mapped_column(ForeignKey('manga.id'), nullable=True, index=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey('user.id'))
+    anime_id: Mapped[Optional[int]] = mapped_column(ForeignKey('anime.id'), nullable=True)
+    manga_id: Mapped[Optional[int]] = mapped_column(ForeignKey('manga.id'), nullable=True)
     current_episode: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     duration: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     current_chapter: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     page_number: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
-    watched_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    watched_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     user: Mapped["User"] = relationship("User")
     anime: Mapped[Optional["Anime"]] = relationship("Anime")
@@ -407,6 +459,10 @@ class WatchHistory(Base):
 
     __table_args__ = (
         CheckConstraint('anime_id IS NOT NULL OR manga_id IS NOT NULL', name='check_media_id'),
+        # append only, "recent history of a user" is a range scan on this index (user_id prefix covers user lookups)
+        Index("ix_watch_history_user_watched_at", "user_id", "watched_at"),
+        _index_not_null("ix_watch_history_anime_id", "anime_id"),
+        _index_not_null("ix_watch_history_manga_id", "manga_id"),
     )
 
 
@@ -415,9 +471,9 @@ class Bookmark(Base):
     __tablename__ = 'bookmarks'
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey('user.id'))
-    episode_id: Mapped[Optional[int]] = mapped_column(ForeignKey('episodes.id'), nullable=True, index=True)
-    chapter_id: Mapped[Optional[int]] = mapped_column(ForeignKey('chapters.id'), nullable=True, index=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
+    episode_id: Mapped[Optional[int]] = mapped_column(ForeignKey('episodes.id'), nullable=True)
+    chapter_id: Mapped[Optional[int]] = mapped_column(ForeignKey('chapters.id'), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
     user: Mapped['User'] = relationship("User")
     episode: Mapped[Optional['Episode']] = relationship("Episode")
@@ -425,6 +481,8 @@ class Bookmark(Base):
 
     __table_args__ = (
         CheckConstraint('episode_id IS NOT NULL OR chapter_id IS NOT NULL', name='check_episode_chapter_id'),
+        _index_not_null("ix_bookmarks_episode_id", "episode_id"),
+        _index_not_null("ix_bookmarks_chapter_id", "chapter_id"),
     )
 
 
@@ -461,18 +519,23 @@ class MediaBase:
     idMal: Mapped[int] = mapped_column(Integer, unique=True, nullable=True)
     site_url: Mapped[str] = mapped_column(String, unique=True, nullable=True)
     
-    title_english: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)
-    title_romaji: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)
+    # equality lookups use the unique constraints, prefix search the NOCASE indexes after the Manga class
+    title_english: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    title_romaji: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     title_native: Mapped[Optional[str]] = mapped_column(String, nullable=True)
 
-    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # large values, deferred: loaded by queries that undefer their group ("body", "images"), see repo.media
+    description: Mapped[Optional[str]] = mapped_column(Text, nullable=True, deferred=True, deferred_group="body")
 
     #image
+    # urls stay inline: cards read them on every list row, an images table would cost a join or a second query
+    # per page for little saving (cover urls are unique per media, only banners repeat across a franchise)
     cover_image_extra_large: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     cover_image_large: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     cover_image_medium: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     cover_image_color: Mapped[Optional[str]] = mapped_column(String, nullable=True)
-    banner_image: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    banner_image: Mapped[Optional[str]] = mapped_column(String, nullable=True, deferred=True,
+                                                        deferred_group="images")
 
 
     # date
@@ -480,8 +543,9 @@ class MediaBase:
     end_date: Mapped[Optional[Date]] = mapped_column(Date, nullable=True)
     
     #score
-    mean_score: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
-    average_score: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # scores are 0-100, popularity/favourites reach the millions so they stay Integer
+    mean_score: Mapped[Optional[int]] = mapped_column(SmallInteger, nullable=True)
+    average_score: Mapped[Optional[int]] = mapped_column(SmallInteger, nullable=True)
     popularity: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     favourites: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
 
@@ -491,12 +555,14 @@ class MediaBase:
 
     
     isAdult: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
-    synonyms: Mapped[Optional[List[str]]] = mapped_column(JSON, default=[])
-
-    # Foreign keys
-    status_id: Mapped[Optional[int]] = mapped_column(ForeignKey("status.id"), nullable=True, index=True)
-    season_id: Mapped[Optional[int]] = mapped_column(ForeignKey("seasons.id"), nullable=True, index=True)
-    format_id: Mapped[Optional[int]] = mapped_column(ForeignKey("formats.id"), nullable=True, index=True)
+    # JSON parsed per row, deferred with the description. Searched through the {table}_search trigram index
+    # (see search_filter), which indexes the stored JSON text, so no per synonym column or array type is needed
+    synonyms: Mapped[Optional[List[str]]] = mapped_column(JSON, default=list, deferred=True, deferred_group="body")
+
+    # Foreign keys, status/season/format are indexed by partial indexes in the table args (rows with a value only)
+    status_id: Mapped[Optional[int]] = mapped_column(ForeignKey("status.id"), nullable=True)
+    season_id: Mapped[Optional[int]] = mapped_column(ForeignKey("seasons.id"), nullable=True)
+    format_id: Mapped[Optional[int]] = mapped_column(ForeignKey("formats.id"), nullable=True)
     country_of_origin_id: Mapped[Optional[int]] = mapped_column(ForeignKey("country_of_origins.id"), nullable=True,
                                                                 index=True)
     source_material_id: Mapped[Optional[int]] = mapped_column(ForeignKey("source_materials.id"), nullable=True,
@@ -504,10 +570,13 @@ class MediaBase:
 
 class Anime(MediaBase, Base):
     __tablename__ = "anime"
+    # short collections load eagerly with selectin (one IN query per page of results). AsyncSession cannot lazy
+    # load, characters/episodes/relations stay lazy and need explicit loader options. Lookup ids (status_id,
+    # format_id, ...) are the enum indexes, read them with convert.get_index_enum instead of joining the lookups
     
     
-    episodes: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
-    duration: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    episodes: Mapped[Optional[int]] = mapped_column(SmallInteger, nullable=True)
+    duration: Mapped[Optional[int]] = mapped_column(SmallInteger, nullable=True)
 
     # Relationships
     status: Mapped[Optional["Status"]] = relationship("Status", back_populates="animes")
@@ -519,21 +588,24 @@ class Anime(MediaBase, Base):
     genres: Mapped[List["Genre"]] = relationship(
         "Genre",
         secondary=anime_genre_association,
-        back_populates="animes"
+        back_populates="animes",
+        lazy="selectin"
     )
     tags: Mapped[List["Tag"]] = relationship(
         "Tag",
         secondary=anime_tag_association,
-        back_populates="animes"
+        back_populates="animes",
+        lazy="selectin"
     )
     studios: Mapped[List["Studio"]] = relationship(
         "Studio",
         secondary=anime_studio_association,
-        back_populates="animes"
+        back_populates="animes",
+        lazy="selectin"
     )
 
     media_character_links: Mapped[List["MediaCharacter"]] = relationship(back_populates="anime")
-    trailers: Mapped[List["Trailer"]] = relationship("Trailer", back_populates="anime")
+    trailers: Mapped[List["Trailer"]] = relationship("Trailer", back_populates="anime", lazy="selectin")
 
     episodes_list: Mapped[List["Episode"]] = relationship("Episode", back_populates="anime")
 
@@ -549,14 +621,25 @@ class Anime(MediaBase, Base):
         UniqueConstraint("title_romaji", name="uq_anime_title_romaji"),
         Index("ix_anime_popularity", "popularity"),
         Index("ix_anime_average_score", "average_score"),
+        # filter by lookup then sort, b-tree indexes are walked both ways so no DESC needed for the sort column.
+        # partial: unknown season/status rows are never looked up by value (filters use IN), so they are left out
+        Index("ix_anime_season_popularity", "season_id", "popularity",
+              postgresql_include=["title_romaji", "cover_image_large"],
+              sqlite_where=text("season_id IS NOT NULL"), postgresql_where=text("season_id IS NOT NULL")),
+        Index("ix_anime_status_average_score", "status_id", "average_score",
+              postgresql_include=["title_romaji", "cover_image_large"],
+              sqlite_where=text("status_id IS NOT NULL"), postgresql_where=text("status_id IS NOT NULL")),
+        Index("ix_anime_format", "format_id",
+              sqlite_where=text("format_id IS NOT NULL"), postgresql_where=text("format_id IS NOT NULL")),
+        Index("ix_anime_start_date", "start_date"),
     )
 
 
 class Manga(MediaBase, Base):
     __tablename__ = "manga"
     
-    chapters: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
-    volumes: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    chapters: Mapped[Optional[int]] = mapped_column(SmallInteger, nullable=True)
+    volumes: Mapped[Optional[int]] = mapped_column(SmallInteger, nullable=True)
 
     # Relationships
     status: Mapped[Optional["Status"]] = relationship("Status", back_populates="mangas")
@@ -568,21 +651,24 @@ class Manga(MediaBase, Base):
     genres: Mapped[List["Genre"]] = relationship(
         "Genre",
         secondary=manga_genre_association,
-        back_populates="mangas"
+        back_populates="mangas",
+        lazy="selectin"
     )
     tags: Mapped[List["Tag"]] = relationship(
         "Tag",
         secondary=manga_tag_association,
-        back_populates="mangas"
+        back_populates="mangas",
+        lazy="selectin"
     )
     studios: Mapped[List["Studio"]] = relationship(  # maybe "publishers" would be better for manga?
         "Studio",
         secondary=manga_studio_association,
-        back_populates="mangas"
+        back_populates="mangas",
+        lazy="selectin"
     )
 
     media_character_links: Mapped[List["MediaCharacter"]] = relationship(back_populates="manga")
-    trailers: Mapped[List["Trailer"]] = relationship("Trailer", back_populates="manga")
+    trailers: Mapped[List["Trailer"]] = relationship("Trailer", back_populates="manga", lazy="selectin")
 
     chapters_list: Mapped[List["Chapter"]] = relationship("Chapter", back_populates="manga")
 
@@ -598,9 +684,29 @@ class Manga(MediaBase, Base):
         UniqueConstraint("title_romaji", name="uq_manga_title_romaji"),
         Index("ix_manga_popularity", "popularity"),
         Index("ix_manga_average_score", "average_score"),
+        # filter by lookup then sort, b-tree indexes are walked both ways so no DESC needed for the sort column.
+        # partial: unknown season/status rows are never looked up by value (filters use IN), so they are left out
+        Index("ix_manga_season_popularity", "season_id", "popularity",
+              postgresql_include=["title_romaji", "cover_image_large"],
+              sqlite_where=text("season_id IS NOT NULL"), postgresql_where=text("season_id IS NOT NULL")),
+        Index("ix_manga_status_average_score", "status_id", "average_score",
+              postgresql_include=["title_romaji", "cover_image_large"],
+              sqlite_where=text("status_id IS NOT NULL"), postgresql_where=text("status_id IS NOT NULL")),
+        Index("ix_manga_format", "format_id",
+              sqlite_where=text("format_id IS NOT NULL"), postgresql_where=text("format_id IS NOT NULL")),
+        Index("ix_manga_start_date", "start_date"),
     )
 
 
+# titles matched by prefix for short search queries (see search_filter): SQLite's LIKE is case-insensitive, and
+# LIKE 'x%' runs as a range search on an index with the NOCASE collation
+TITLE_COLUMNS = ("title_english", "title_romaji", "title_native")
+for _model in (Anime, Manga):
+    for _column in TITLE_COLUMNS:
+        Index(f"ix_{_model.__tablename__}_{_column}_nocase",
+              getattr(_model, _column).collate("NOCASE")).ddl_if(dialect="sqlite")
+
+
 T = TypeVar('T')  # Generic type for SQLAlchemy models
 
 async def populate_reference_tables(session: AsyncSession, **kwargs: List[T]) -> None:
@@ -672,12 +778,297 @@ async def populate_reference_tables(session: AsyncSession, **kwargs: List[T]) ->
         raise
 
 
+SQLITE_PRAGMAS = (
+    "PRAGMA foreign_keys=ON",
+    # readers don't block the writer, and commits append to the WAL instead of rewriting pages
+    "PRAGMA journal_mode=WAL",
+    # with WAL, NORMAL only syncs at checkpoints: a power loss can drop the last commits, never corrupt
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",  # 256 MiB
+    "PRAGMA cache_size=-65536",  # 64 MiB, negative is KiB
+)
+
+
+@event.listens_for(Engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Apply SQLITE_PRAGMAS to every new sqlite connection, of sync engines and the async engines' sync_engine."""
+    # sqlite3 connections, or SQLAlchemy's aiosqlite adapter
+    if "sqlite" not in type(dbapi_connection).__module__:
+        return
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def create_app_engine(url: str, **kwargs) -> AsyncEngine:
+    """
+    Create the application AsyncEngine with a sized pool, plus liveness checks for network databases.
+
+    Args:
+        url: Database URL (e.g. sqlite+aiosqlite:///path/to/db).
+        **kwargs: Extra create_async_engine arguments, override the defaults below.
+
+    Returns:
+        Configured AsyncEngine instance.
+    """
+    db_url = make_url(url)
+    is_sqlite = db_url.get_backend_name() == "sqlite"
+    # insertmanyvalues batches executemany INSERTs (bulk_upsert, create_many) into multi row statements
+    options = {"insertmanyvalues_page_size": 1000}
+    if not is_sqlite:
+        # network connections: check liveness on checkout and replace them before server side timeouts
+        options.update(pool_pre_ping=True, pool_recycle=1800)
+        # lifo hands out the most recently returned connection, idle extras age out through pool_recycle
+        options.update(poolclass=AsyncAdaptedQueuePool, pool_size=20, max_overflow=20, pool_use_lifo=True)
+    elif db_url.database not in (None, "", ":memory:"):
+        # a file connection has no handshake to save but costs a thread and its own page cache (see
+        # SQLITE_PRAGMAS), and sqlite serializes writers anyway: keep a few. In memory sqlite runs on a
+        # single shared connection (StaticPool), which takes no pool arguments
+        options.update(poolclass=AsyncAdaptedQueuePool, pool_size=4, max_overflow=4, pool_use_lifo=True)
+    # prepared statements are cached per connection by the driver, next to SQLAlchemy's compiled cache
+    if db_url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {"server_settings": {"tcp_keepalives_idle": "30"},
+                                   "prepared_statement_cache_size": 500}
+    elif is_sqlite:
+        # sqlite3 default is 128 statements, the filter/search queries come in many shapes
+        options["connect_args"] = {"cached_statements": 500}
+    options.update(kwargs)
+    engine = create_async_engine(db_url, **options)
+    # queries are compiled once per statement shape and cached, keep values as bound parameters (no f-string sql)
+    if not engine.dialect.supports_statement_cache:
+        logger.warning(f"SQL compilation cache is disabled for dialect '{engine.dialect.name}', queries will be "
+                       f"recompiled on every execution")
+    return engine
+
+
+def pool_stats(engine: AsyncEngine) -> dict:
+    """
+    Snapshot of the engine connection pool, for logging under load.
+
+    Returns:
+        Dict with size, checked_in, checked_out and overflow counts, empty when the pool has no counters
+        (in memory sqlite).
+    """
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {}
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+
+
+async def warm_pool(engine: AsyncEngine, size: Optional[int] = None) -> int:
+    """
+    Open pool connections up front and return them to the pool, so the first queries don't pay the connect
+    (network handshake and authentication) cost.
+
+    Args:
+        engine: AsyncEngine, see `create_app_engine`.
+        size: Connections to open, defaults to the pool size.
+
+    Returns:
+        Number of connections opened, 0 for sqlite: opening a file is cheap, connections are made on demand.
+    """
+    pool = engine.pool
+    if engine.dialect.name == "sqlite" or not isinstance(pool, QueuePool):
+        return 0
+    size = pool.size() if size is None else size
+    # opened concurrently, then all returned, otherwise the pool would hand the same connection back each time
+    results = await asyncio.gather(*(engine.connect() for _ in range(size)), return_exceptions=True)
+    connections = [result for result in results if not isinstance(result, BaseException)]
+    await asyncio.gather(*(connection.close() for connection in connections))
+    if len(connections) < size:
+        logger.warning(f"Pool warm up opened {len(connections)} of {size} connections: "
+                       f"{next(result for result in results if isinstance(result, BaseException))}")
+    logger.debug(f"Pool warmed up: {pool_stats(engine)}")
+    return len(connections)
+
+
+def make_session_factory(engine: AsyncEngine) -> async_sessionmaker:
+    """
+    Create the application session factory.
+
+    Objects are not expired on commit (no reload query on the next attribute access, which an
+    AsyncSession can't do implicitly anyway) and queries don't autoflush. Call `session.flush()`
+    before querying pending changes and `await session.refresh(obj)` when post commit database
+    state (server defaults, triggers) is needed. With STRICT_LOAD=1 relationships a query does not
+    load raise on access (see `StrictLoadSession`).
+
+    Args:
+        engine: AsyncEngine, see `create_app_engine`.
+
+    Returns:
+        async_sessionmaker producing AsyncSession instances.
+    """
+    sync_session_class = StrictLoadSession if STRICT_LOAD else Session
+    return async_sessionmaker(engine, class_=AsyncSession, sync_session_class=sync_session_class,
+                              expire_on_commit=False, autoflush=False)
+
+
+async def _insert_reference_rows(conn) -> None:
+    # convert imports this module, so it is imported on use
+    from database.convert import reference_rows
+
+    for table_name, rows in reference_rows().items():
+        # one multi row statement per table, existing rows are kept
+        stmt = sqlite_insert(Base.metadata.tables[table_name]).values(rows).prefix_with("OR IGNORE")
+        await conn.execute(stmt)
+        logger.debug(f"Seeded (or ignored) {len(rows)} records into '{table_name}'")
+
+
+async def seed_reference_data(engine: AsyncEngine) -> None:
+    """
+    Insert the enum backed reference rows (genres, statuses, formats, ...) in a single transaction.
+
+    Args:
+        engine: AsyncEngine instance for database connection.
+    """
+    async with engine.begin() as conn:
+        await _insert_reference_rows(conn)
+
+
+# columns matched by the media search box, synonyms is the JSON text as stored
+SEARCH_COLUMNS = TITLE_COLUMNS + ("synonyms", "description")
+# the trigram tokenizer only indexes sequences of 3 characters, shorter queries match title prefixes
+SEARCH_MIN_LENGTH = 3
+
+
+def _search_table_ddl(table_name: str) -> str:
+    """FTS5 trigram index over the search columns of a media table, an external content table on the media rows."""
+    return (f"CREATE VIRTUAL TABLE IF NOT EXISTS {table_name}_search USING fts5({', '.join(SEARCH_COLUMNS)}, "
+            f"content='{table_name}', content_rowid='id', tokenize='trigram')")
+
+
+def _search_trigger_ddl(table_name: str) -> List[str]:
+    """Triggers keeping the search index of a media table in sync, dropped with the media table."""
+    search = f"{table_name}_search"
+    columns = ", ".join(SEARCH_COLUMNS)
+    new_values = ", ".join(f"new.{column}" for column in SEARCH_COLUMNS)
+    old_values = ", ".join(f"old.{column}" for column in SEARCH_COLUMNS)
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {search}_ai AFTER INSERT ON {table_name} BEGIN "
+        f"INSERT INTO {search}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {search}_ad AFTER DELETE ON {table_name} BEGIN "
+        f"INSERT INTO {search}({search}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {search}_au AFTER UPDATE OF {columns} ON {table_name} BEGIN "
+        f"INSERT INTO {search}({search}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {search}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+    ]
+
+
+async def _create_search_tables(conn) -> None:
+    if conn.dialect.name != "sqlite":
+        return
+    for table_name in (Anime.__tablename__, Manga.__tablename__):
+        search = f"{table_name}_search"
+        exists = await conn.scalar(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": search}
+        )
+        await conn.execute(text(_search_table_ddl(table_name)))
+        # the triggers go away with the media table (drop_all), so they are (re)created on every init
+        for statement in _search_trigger_ddl(table_name):
+            await conn.execute(text(statement))
+        if not exists:
+            # index the rows that were there before the search table
+            await conn.execute(text(f"INSERT INTO {search}({search}) VALUES ('rebuild')"))
+            logger.info(f"Created search index '{search}'")
+
+
+async def _drop_search_tables(conn) -> None:
+    if conn.dialect.name != "sqlite":
+        return
+    for table_name in (Anime.__tablename__, Manga.__tablename__):
+        await conn.execute(text(f"DROP TABLE IF EXISTS {table_name}_search"))
+
+
+def search_filter(model, query: str):
+    """
+    Filter clause for the media search box.
+
+    Queries of SEARCH_MIN_LENGTH characters or more match a case-insensitive substring of the search
+    columns, looked up in the FTS5 trigram index created by `init_db`. Shorter ones (which as a substring
+    match nearly every row) match the start of a title, a range search on the NOCASE title indexes.
+
+    Args:
+        model: Anime or Manga.
+        query: Text typed in the search box.
+
+    Returns:
+        A clause for `Select.where`.
+    """
+    if len(query) < SEARCH_MIN_LENGTH:
+        prefix = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return or_(*(getattr(model, column).like(prefix, escape="\\") for column in TITLE_COLUMNS))
+    search = f"{model.__tablename__}_search"
+    # a quoted phrase is a plain substring match for the trigram tokenizer
+    phrase = '"' + query.replace('"', '""') + '"'
+    matches = select(literal_column("rowid")).select_from(text(search)).where(
+        literal_column(search).op("MATCH")(phrase)
+    )
+    return model.id.in_(matches)
+
+
+def check_mappers() -> List[str]:
+    """
+    Configure all mappers now and log relationship wiring warnings (back_populates/secondary mismatches),
+    those otherwise show up once at the first query and fall back to slower loading.
+
+    Returns:
+        Warning messages emitted while configuring.
+    """
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", SAWarning)
+        configure_mappers()
+    messages = [str(w.message) for w in caught if issubclass(w.category, SAWarning)]
+    for message in messages:
+        logger.warning(f"Mapper configuration: {message}")
+    return messages
+
+
+async def _upgrade_schema(conn) -> None:
+    """
+    Bring tables created by earlier versions up to the models, create_all only creates missing tables.
+
+    media_characters.role (role name) became role_id (character_roles FK), the column is added and filled
+    from the role names, the old column is left in place.
+    """
+    columns = await conn.run_sync(
+        lambda sync_conn: {column["name"] for column in inspect(sync_conn).get_columns(MediaCharacter.__tablename__)}
+    )
+    if "role_id" in columns:
+        return
+    await conn.execute(text("ALTER TABLE media_characters ADD COLUMN role_id INTEGER REFERENCES character_roles(id)"))
+    if "role" in columns:
+        await conn.execute(text(
+            "UPDATE media_characters SET role_id = "
+            "(SELECT character_roles.id FROM character_roles WHERE upper(character_roles.name) = upper(media_characters.role)) "
+            "WHERE role IS NOT NULL"
+        ))
+    for index in MediaCharacter.__table__.indexes:
+        await conn.run_sync(index.create, checkfirst=True)
+    logger.info("Upgraded 'media_characters': added role_id")
+
+
 async def init_db(engine: AsyncEngine) -> None:
+    """Create all tables and search indexes and seed the reference rows, get the engine from `create_app_engine`."""
+    check_mappers()
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await _create_search_tables(conn)
+        await _insert_reference_rows(conn)
+        # after seeding, the backfill looks the role names up in character_roles
+        await _upgrade_schema(conn)
 
 async def drop_all_tables(engine: AsyncEngine) -> None:
     async with engine.begin() as conn:
+        # the search tables are not in the metadata, left over they would keep indexing the dropped rows
+        await _drop_search_tables(conn)
         await conn.run_sync(Base.metadata.drop_all)
 
 
@@ -692,14 +1083,6 @@ def sync_init_db(engine: Engine) -> None:
         SQLAlchemyError: If database initialization fails.
     """
     try:
-        # Enable foreign key support for SQLite
-        if engine.dialect.name == "sqlite":
-            @event.listens_for(engine, "connect")
-            def set_sqlite_pragma(dbapi_connection, connection_record):
-                cursor = dbapi_connection.cursor()
-                cursor.execute("PRAGMA foreign_keys=ON")
-                cursor.close()
-
         with engine.begin() as conn:
             logger.info("Creating database tables...")
             Base.metadata.create_all(conn)
@@ -709,6 +1092,112 @@ def sync_init_db(engine: Engine) -> None:
         raise
 
 
+# loader presets per access pattern, many-to-many on selectin (join based loading multiplies rows), many-to-one joined.
+# list: media cards, which hand their rows to the media page (genres, tags, description, banner, synonyms)
+ANIME_LIST_OPTIONS = (
+    selectinload(Anime.genres),
+    selectinload(Anime.tags),
+    undefer_group("body"),
+    undefer_group("images"),
+)
+MANGA_LIST_OPTIONS = (
+    selectinload(Manga.genres),
+    selectinload(Manga.tags),
+    undefer_group("body"),
+    undefer_group("images"),
+)
+# detail: a single media with everything the media page can show
+ANIME_DETAIL_OPTIONS = ANIME_LIST_OPTIONS + (
+    selectinload(Anime.studios),
+    selectinload(Anime.trailers),
+    selectinload(Anime.media_character_links).joinedload(MediaCharacter.character),
+)
+MANGA_DETAIL_OPTIONS = MANGA_LIST_OPTIONS + (
+    selectinload(Manga.studios),
+    selectinload(Manga.trailers),
+    selectinload(Manga.media_character_links).joinedload(MediaCharacter.character),
+)
+
+def load_character_full(stmt: Select) -> Select:
+    """
+    Add loader options for characters with their media links (role_id) and linked anime/manga,
+    pass the loaded characters to `populate_character_media` to fill `animes`/`mangas` from them.
+
+    Example:
+        characters = (await session.scalars(load_character_full(select(Character)))).all()
+        populate_character_media(characters)
+    """
+    return stmt.options(
+        selectinload(Character.media_character_links).joinedload(MediaCharacter.anime),
+        selectinload(Character.media_character_links).joinedload(MediaCharacter.manga),
+    )
+
+
+def populate_character_media(characters: List[Character]) -> None:
+    """Fill the viewonly Character.animes/mangas from already loaded links, instead of querying them again."""
+    for character in characters:
+        links = character.media_character_links
+        set_committed_value(character, "animes", [link.anime for link in links if link.anime is not None])
+        set_committed_value(character, "mangas", [link.manga for link in links if link.manga is not None])
+
+# development switch: relationships not loaded by a query's options raise instead of lazy loading
+STRICT_LOAD = os.getenv("STRICT_LOAD", "0") == "1"
+
+def strict_load(*loaders) -> tuple:
+    """
+    Loader options for a query, plus a raiseload("*") fallback when STRICT_LOAD=1 is set.
+
+    With strict loading every relationship the caller reads must be listed, the mapper defaults
+    (selectin/joined) are replaced by the fallback too. Without it the options are returned as is.
+
+    Example:
+        select(Anime).options(*strict_load(selectinload(Anime.tags), selectinload(Anime.genres)))
+    """
+    if STRICT_LOAD:
+        return (*loaders, raiseload("*"))
+    return loaders
+
+
+class StrictLoadSession(Session):
+    """Session used by `make_session_factory` when STRICT_LOAD=1, see `_raiseload_by_default`."""
+
+
+@event.listens_for(StrictLoadSession, "do_orm_execute")
+def _raiseload_by_default(orm_execute_state) -> None:
+    """
+    Add raiseload("*", sql_only=True) to every top level ORM select, so queries that don't go through
+    `strict_load` fail loudly too. Relationships named in the query options still load (a path option
+    overrides the wildcard), sql_only lets many-to-one reads already in the identity map through.
+    """
+    if (orm_execute_state.is_select and not orm_execute_state.is_relationship_load
+            and not orm_execute_state.is_column_load):
+        orm_execute_state.statement = orm_execute_state.statement.options(raiseload("*", sql_only=True))
+
+
+@contextmanager
+def count_queries(engine: Union[Engine, AsyncEngine]) -> Iterator[List[str]]:
+    """
+    Collect the SQL statements executed on engine inside the block, e.g. to assert a query count.
+
+    Args:
+        engine: Engine or AsyncEngine to listen on.
+
+    Yields:
+        List filled with each executed statement.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    statements: List[str] = []
+
+    def _on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(sync_engine, "before_cursor_execute", _on_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", _on_execute)
+
+
 if __name__ == "__main__":
     # Load database URL from environment variable or default to SQLite
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///mydatabase.db")
@@ -1,18 +1,20 @@
 import asyncio
+from contextlib import asynccontextmanager, nullcontext
 
 from loguru import logger
 from numpy.random.mtrand import Sequence
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, String, and_, case
+from sqlalchemy import select, delete, update, String, and_, case
 from sqlalchemy.orm import selectinload, Mapped, mapped_column, sessionmaker
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.sql import func
-from typing import List, Optional, Dict, Union, Tuple
-from datetime import datetime, timezone
+from typing import List, Optional, Dict, Union, Tuple, AsyncIterator
 from enum import Enum
 
 from AnillistPython import MediaType, MediaStatus, MediaFormat, MediaSource, MediaSeason
-from database.models import UserLibrary, UserCategory, library_category, Manga, Anime
+from database.models import UserLibrary, UserCategory, library_category, Manga, Anime, create_app_engine, \
+    make_session_factory, warm_pool
 from database.repo.media import AsyncMediaRepository, SortBy, SortOrder
 
 
@@ -28,6 +30,47 @@ class AsyncLibraryRepository:
 
         # asyncio.ensure_future(self._post_init())
 
+    @classmethod
+    async def create(cls, url: str, user_id: int, warm: bool = True, **engine_kwargs) -> "AsyncLibraryRepository":
+        """
+        Build a repository on its own engine and session factory, see `create_app_engine` for the pool settings.
+
+        Args:
+            url: Database URL (e.g. sqlite+aiosqlite:///path/to/db).
+            user_id: The user whose library is managed.
+            warm: Open the pool connections before returning (see `warm_pool`).
+            **engine_kwargs: Extra create_async_engine arguments (pool_size, max_overflow, ...).
+
+        Returns:
+            AsyncLibraryRepository with an AsyncMediaRepository on the same session factory.
+        """
+        engine = create_app_engine(url, **engine_kwargs)
+        session_maker = make_session_factory(engine)
+        if warm:
+            await warm_pool(engine)
+        return cls(session_maker, AsyncMediaRepository(session_maker), user_id)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[AsyncSession]:
+        """
+        Share one session and transaction between several repository calls, committed once on exit and rolled
+        back on error.
+
+        Methods given the yielded session never commit and raise their errors, the caller owns the unit of work.
+
+        Example:
+            async with library_repo.transaction() as session:
+                entry = await library_repo.update_library_entry(library_id, progress=12, session=session)
+                await library_repo.add_category_to_library_entry(entry.id, category_id, session=session)
+        """
+        async with self.session_maker() as session:
+            async with session.begin():
+                yield session
+
+    def _unit_of_work(self, session: Optional[AsyncSession]):
+        """The caller's session as is, otherwise a new transaction committed when the method is done."""
+        return nullcontext(session) if session is not None else self.transaction()
+
     async def _post_init(self):
         logger.info(f"Starting _post_init for user_id: {self.user_id}")
         try:
@@ -112,8 +155,9 @@ class AsyncLibraryRepository:
             status_id: Optional[int] = None,
             progress: int = 0,
             categories: Optional[List[UserCategory]] = None,  # Changed to Optional as it can be None
+            session: Optional[AsyncSession] = None
     ) -> Optional[UserLibrary]:  # Changed return type to Optional as it can return None on error
-        """Add a new library entry for a user (anime or manga)."""
+        """Add a new library entry for a user (anime or manga), in the caller's transaction when session is given."""
         logger.info(
             f"Attempting to add library entry for user {user_id} (Media Type: {media_type.name}, Media ID: {media_id})")
         logger.debug(
@@ -133,44 +177,45 @@ class AsyncLibraryRepository:
                 f"Failed to add library entry: Neither anime_id nor manga_id could be set for media_type {media_type.name}.")
             return None
 
-        library_entry = UserLibrary(
-            user_id=user_id,
-            manga_id=manga_id,
-            anime_id=anime_id,
-            status_id=status_id,
-            progress=progress,
-            categories=categories,
-        )
-        async with self.session_maker() as session:
-            try:
-                session.add(library_entry)
-                await session.commit()
-                await session.refresh(library_entry)
-                logger.success(f"Successfully added library entry ID {library_entry.id} for user {user_id}.")
-                return library_entry
-            except Exception as e:
-                await session.rollback()
-                logger.error(
-                    f"Error adding library entry for user {user_id}, media {media_id} ({media_type.name}): {e}",
-                    exc_info=True)
-                return None
+        try:
+            async with self._unit_of_work(session) as active_session:
+                library_entry = UserLibrary(
+                    user_id=user_id,
+                    manga_id=manga_id,
+                    anime_id=anime_id,
+                    status_id=status_id,
+                    progress=progress,
+                    categories=categories,
+                )
+                active_session.add(library_entry)
+                await active_session.flush()
+                await active_session.refresh(library_entry)
+            logger.success(f"Successfully added library entry ID {library_entry.id} for user {user_id}.")
+            return library_entry
+        except Exception as e:
+            logger.error(
+                f"Error adding library entry for user {user_id}, media {media_id} ({media_type.name}): {e}",
+                exc_info=True)
+            if session is not None:
+                raise
+            return None
 
     async def create_category(
             self, user_id: int, name: str, description: str = "", hidden: bool = False, is_deletable: bool = True,
-            position: int = -1
+            position: int = -1, session: Optional[AsyncSession] = None
     ) -> Optional[UserCategory]:
-        """Create a new category for a user."""
+        """Create a new category for a user, in the caller's transaction when session is given."""
         logger.info(f"Attempting to create category '{name}' for user {user_id}.")
         logger.debug(f"Description: '{description}', Hidden: {hidden}")
 
-        async with self.session_maker() as session:
-            try:
+        try:
+            async with self._unit_of_work(session) as active_session:
                 # Check for existing category with the same name for this user
                 existing_category_stmt = select(UserCategory).where(
                     UserCategory.user_id == user_id,
                     UserCategory.name == name
                 )
-                existing_category_result = await session.execute(existing_category_stmt)
+                existing_category_result = await active_session.execute(existing_category_stmt)
                 if existing_category_result.scalar_one_or_none():
                     logger.warning(f"Category '{name}' already exists for user {user_id}. Cannot create duplicate.")
                     return None
@@ -181,61 +226,63 @@ class AsyncLibraryRepository:
                     description=description,
                     hidden=hidden,
                     is_deletable=is_deletable,
-                    position=position,
-                    created_at=datetime.now(timezone.utc)
+                    position=position
                 )
-                session.add(category)
-                await session.commit()
-                await session.refresh(category)
-                self.categories[name] = category  # Update in-memory cache
-                logger.success(f"Successfully created category '{name}' (ID: {category.id}) for user {user_id}.")
-                return category
-            except Exception as e:
-                await session.rollback()
-                logger.error(f"Error creating category '{name}' for user {user_id}: {e}", exc_info=True)
-                return None
+                active_session.add(category)
+                await active_session.flush()
+                await active_session.refresh(category)
+            self.categories[name] = category  # Update in-memory cache
+            logger.success(f"Successfully created category '{name}' (ID: {category.id}) for user {user_id}.")
+            return category
+        except Exception as e:
+            logger.error(f"Error creating category '{name}' for user {user_id}: {e}", exc_info=True)
+            if session is not None:
+                raise
+            return None
 
-    async def get_category_from_id(self, category_id: int) -> Optional[UserCategory]:
+    async def get_category_from_id(
+            self, category_id: int, session: Optional[AsyncSession] = None
+    ) -> Optional[UserCategory]:
         """Get a category by its ID, optionally from cache."""
-        async with self.session_maker() as session:
-            async with session.begin():
-                category = self._get_category_from_cache(category_id)
-                if category is not None:
-                    return category
+        category = self._get_category_from_cache(category_id)
+        if category is not None:
+            return category
 
-                stmt = select(UserCategory).where(UserCategory.id == category_id)
-                result = await session.execute(stmt)
-                category = result.scalar_one_or_none()
+        async with self._unit_of_work(session) as active_session:
+            stmt = select(UserCategory).where(UserCategory.id == category_id)
+            result = await active_session.execute(stmt)
+            category = result.scalar_one_or_none()
 
-                if category is None:
-                    logger.warning(f"Category with ID {category_id} not found.")
-                    return None
+        if category is None:
+            logger.warning(f"Category with ID {category_id} not found.")
+            return None
 
-                return category
+        return category
 
-    async def get_category_from_name(self, category_name: str, user_id: int) -> Optional[UserCategory]:
+    async def get_category_from_name(
+            self, category_name: str, user_id: int, session: Optional[AsyncSession] = None
+    ) -> Optional[UserCategory]:
         """Get a category by its name and user ID, optionally from in-memory cache."""
-        async with self.session_maker() as session:
-            async with session.begin():
-                category = self.categories.get(category_name)
-                if category is not None:
-                    return category
-
-                stmt = select(UserCategory).where(
-                    and_(UserCategory.name == category_name, UserCategory.user_id == user_id)
-                )
-                result = await session.execute(stmt)
-                category = result.scalar_one_or_none()
-
-                if category is None:
-                    logger.warning(f"Category with name '{category_name}' not found for user ID {user_id}.")
-                    return None
+        category = self.categories.get(category_name)
+        if category is not None:
+            return category
 
-                return category
+        async with self._unit_of_work(session) as active_session:
+            stmt = select(UserCategory).where(
+                and_(UserCategory.name == category_name, UserCategory.user_id == user_id)
+            )
+            result = await active_session.execute(stmt)
+            category = result.scalar_one_or_none()
 
+        if category is None:
+            logger.warning(f"Category with name '{category_name}' not found for user ID {user_id}.")
+            return None
 
+        return category
 
-    async def get_library_entry(self, library_id: int) -> Optional[UserLibrary]:
+    async def get_library_entry(
+            self, library_id: int, session: Optional[AsyncSession] = None
+    ) -> Optional[UserLibrary]:
         """Retrieve a specific library entry by its ID, including related categories."""
         logger.info(f"Attempting to retrieve library entry with ID: {library_id}")
         query = (
@@ -243,22 +290,24 @@ class AsyncLibraryRepository:
             .options(selectinload(UserLibrary.categories))
             .where(UserLibrary.id == library_id)
         )
-        async with self.session_maker() as session:
-            try:
-                result = await session.execute(query)
+        try:
+            async with self._unit_of_work(session) as active_session:
+                result = await active_session.execute(query)
                 entry = result.scalar_one_or_none()
-                if entry:
-                    logger.success(f"Successfully retrieved library entry ID: {library_id}.")
-                    logger.debug(f"Retrieved entry: {entry}")
-                else:
-                    logger.warning(f"Library entry with ID {library_id} not found.")
-                return entry
-            except Exception as e:
-                logger.error(f"Error retrieving library entry with ID {library_id}: {e}", exc_info=True)
-                return None
+            if entry:
+                logger.success(f"Successfully retrieved library entry ID: {library_id}.")
+                logger.debug(f"Retrieved entry: {entry}")
+            else:
+                logger.warning(f"Library entry with ID {library_id} not found.")
+            return entry
+        except Exception as e:
+            logger.error(f"Error retrieving library entry with ID {library_id}: {e}", exc_info=True)
+            if session is not None:
+                raise
+            return None
 
     async def get_user_library(
-            self, user_id: int, include_categories: bool = True
+            self, user_id: int, include_categories: bool = True, session: Optional[AsyncSession] = None
     ) -> Sequence[UserLibrary]:
         """Retrieve all library entries for a user, optionally including categories."""
         logger.info(f"Attempting to retrieve all library entries for user {user_id}.")
@@ -267,177 +316,179 @@ class AsyncLibraryRepository:
         if include_categories:
             query = query.options(selectinload(UserLibrary.categories))
 
-        async with self.session_maker() as session:
-            try:
-                result = await session.execute(query)
+        try:
+            async with self._unit_of_work(session) as active_session:
+                result = await active_session.execute(query)
                 entries = result.scalars().all()
-                logger.success(f"Successfully retrieved {len(entries)} library entries for user {user_id}.")
-                return entries
-            except Exception as e:
-                logger.error(f"Error retrieving user library for user {user_id}: {e}", exc_info=True)
-                return []
+            logger.success(f"Successfully retrieved {len(entries)} library entries for user {user_id}.")
+            return entries
+        except Exception as e:
+            logger.error(f"Error retrieving user library for user {user_id}: {e}", exc_info=True)
+            if session is not None:
+                raise
+            return []
 
     async def update_library_entry(
             self,
             library_id: int,
             status_id: Optional[int] = None,
-            progress: Optional[int] = None
+            progress: Optional[int] = None,
+            session: Optional[AsyncSession] = None
     ) -> Optional[UserLibrary]:
-        """Update a library entry's status or progress."""
+        """
+        Update a library entry's status or progress, the returned entry has no categories loaded.
+
+        Pass session to run in the caller's transaction (see `transaction`), errors are raised then.
+        """
         logger.info(f"Attempting to update library entry ID: {library_id}.")
         logger.debug(f"Update parameters: status_id={status_id}, progress={progress}")
 
-        library_entry = await self.get_library_entry(library_id)
-        if not library_entry:
-            logger.warning(f"Update failed: Library entry with ID {library_id} not found.")
-            return None
-
-        updated_fields = []
-        if status_id is not None and library_entry.status_id != status_id:
-            library_entry.status_id = status_id
-            updated_fields.append(f"status_id to {status_id}")
-        if progress is not None and library_entry.progress != progress:
-            library_entry.progress = progress
-            updated_fields.append(f"progress to {progress}")
-
-        if not updated_fields:
-            logger.info(f"No changes detected for library entry ID {library_id}. No update performed.")
-            return library_entry  # Return the original entry if no changes
-
-        async with self.session_maker() as session:
-            try:
-                # Merge the detached object into the current session
-                session.add(library_entry)  # This will either add or merge if already exists by primary key
-                await session.commit()
-                await session.refresh(library_entry)
-                logger.success(f"Successfully updated library entry ID {library_id}: {', '.join(updated_fields)}.")
-                return library_entry
-            except Exception as e:
-                await session.rollback()
-                logger.error(f"Error updating library entry ID {library_id}: {e}", exc_info=True)
+        values = {}
+        if status_id is not None:
+            values["status_id"] = status_id
+        if progress is not None:
+            values["progress"] = progress
+        if not values:
+            logger.info(f"No changes given for library entry ID {library_id}. No update performed.")
+            return await self.get_library_entry(library_id, session=session)
+
+        # one UPDATE ... RETURNING in a single session, the categories are not loaded
+        # populate_existing: a caller's session may already hold the row, overwrite it with the returned values
+        stmt = (
+            update(UserLibrary)
+            .where(UserLibrary.id == library_id)
+            .values(**values)
+            .returning(UserLibrary)
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        try:
+            async with self._unit_of_work(session) as active_session:
+                library_entry = (await active_session.scalars(stmt)).one_or_none()
+            if library_entry is None:
+                logger.warning(f"Update failed: Library entry with ID {library_id} not found.")
                 return None
+            updated_fields = ", ".join(f"{key} to {value}" for key, value in values.items())
+            logger.success(f"Successfully updated library entry ID {library_id}: {updated_fields}.")
+            return library_entry
+        except Exception as e:
+            logger.error(f"Error updating library entry ID {library_id}: {e}", exc_info=True)
+            if session is not None:
+                raise
+            return None
 
-    async def delete_library_entry(self, library_id: int) -> bool:
-        """Delete a library entry by its ID."""
+    async def delete_library_entry(self, library_id: int, session: Optional[AsyncSession] = None) -> bool:
+        """Delete a library entry by its ID, in the caller's transaction when session is given."""
         logger.info(f"Attempting to delete library entry with ID: {library_id}.")
 
-        # First, check if the entry exists to provide better logging
-        existing_entry = await self.get_library_entry(library_id)
-        if not existing_entry:
-            logger.warning(f"Delete failed: Library entry with ID {library_id} not found.")
-            return False
-
-        async with self.session_maker() as session:
-            try:
-                # Merge the existing entry to the session in case it's detached
-                merged_entry = await session.merge(existing_entry)
-                await session.delete(merged_entry)
-                await session.commit()
-
-                # Verify deletion using async-compatible select
-                result = await session.execute(select(UserLibrary).filter_by(id=library_id))
-                if result.scalar_one_or_none() is None:
-                    logger.success(f"Successfully deleted library entry ID: {library_id}.")
-                    return True
-                else:
-                    logger.warning(f"Deletion of library entry ID {library_id} seemed to fail, entry still exists.")
+        try:
+            async with self._unit_of_work(session) as active_session:
+                # loaded and deleted in the same session, no merge of a detached entry needed
+                existing_entry = await self.get_library_entry(library_id, session=active_session)
+                if not existing_entry:
+                    logger.warning(f"Delete failed: Library entry with ID {library_id} not found.")
                     return False
-
-            except SQLAlchemyError as e:
-                await session.rollback()
-                logger.error(f"Error deleting library entry ID {library_id}: {e}", exc_info=True)
-                return False
-            except:
+                await active_session.delete(existing_entry)
+                await active_session.flush()
+            logger.success(f"Successfully deleted library entry ID: {library_id}.")
+            return True
+        except SQLAlchemyError as e:
+            logger.error(f"Error deleting library entry ID {library_id}: {e}", exc_info=True)
+            if session is not None:
                 raise
+            return False
 
-    async def delete_category(self, category_id: int) -> bool:
-        """Delete a category by its ID."""
+    async def delete_category(self, category_id: int, session: Optional[AsyncSession] = None) -> bool:
+        """Delete a category by its ID, in the caller's transaction when session is given."""
         logger.info(f"Attempting to delete category with ID: {category_id}.")
-        category = await self.get_category_from_id(category_id)
-        if not category:
-            logger.warning(f"Delete failed: Category with ID {category_id} not found.")
-            return False
 
-        async with self.session_maker() as session:
-            try:
-                async with session.begin():
-                    await session.delete(category)
-                    self.categories.pop(category.name, None)
-
-                    return True
-
-            except SQLAlchemyError as e:
-                await session.rollback()
-                logger.error(f"Error deleting category ID {category_id}: {e}", exc_info=True)
-                return False
-            except:
+        try:
+            async with self._unit_of_work(session) as active_session:
+                category = await self.get_category_from_id(category_id, session=active_session)
+                if not category:
+                    logger.warning(f"Delete failed: Category with ID {category_id} not found.")
+                    return False
+                await active_session.delete(category)
+                await active_session.flush()
+            self.categories.pop(category.name, None)
+            return True
+        except SQLAlchemyError as e:
+            logger.error(f"Error deleting category ID {category_id}: {e}", exc_info=True)
+            if session is not None:
                 raise
+            return False
 
-    async def add_category_to_library_entry(self, library_id: int, category_id: int) -> bool:
-        """Add a category to a library entry."""
+    async def add_category_to_library_entry(
+            self, library_id: int, category_id: int, session: Optional[AsyncSession] = None
+    ) -> bool:
+        """
+        Add a category to a library entry with a single INSERT on library_category.
+
+        Args:
+            library_id: The library entry to link.
+            category_id: The category to link it to.
+            session: Run in the caller's transaction instead of committing (see `transaction`),
+                     errors are raised then so the caller can roll back.
+
+        Returns:
+            True if the link was added, False if it already existed, the entry or category does not exist
+            (foreign key error) or the insert failed.
+        """
         logger.info(f"Attempting to add category {category_id} to library entry {library_id}.")
-        async with self.session_maker() as session:
-            async with session.begin():
-                try:
-                    library_entry = await session.get(
-                        UserLibrary,
-                        library_id,
-                        options=[selectinload(UserLibrary.categories)]
-                    )
-                    if not library_entry:
-                        logger.warning(f"Failed to add category: Library entry {library_id} not found.")
-                        return False
-
-                    category = await session.get(UserCategory, category_id)
-                    if not category:
-                        logger.warning(f"Failed to add category: Category {category_id} not found.")
-                        return False
-
-                    if category in library_entry.categories:
-                        logger.info(f"Category {category_id} already associated with library entry {library_id}.")
-                        return False
-
-                    library_entry.categories.append(category)
-                    logger.success(f"Successfully added category {category_id} to library entry {library_id}.")
-                    return True
-
-                except Exception as e:
-                    logger.error(f"Error adding category {category_id} to library entry {library_id}: {e}",
-                                 exc_info=True)
-                    return False
-
-    async def remove_category_from_library_entry(self, library_id: int, category_id: int) -> bool:
-        """Remove a category from a library entry."""
+        stmt = sqlite_insert(library_category).values(library_id=library_id, category_id=category_id)
+        stmt = stmt.prefix_with("OR IGNORE")
+        try:
+            async with self._unit_of_work(session) as active_session:
+                result = await active_session.execute(stmt)
+        except Exception as e:
+            logger.error(f"Error adding category {category_id} to library entry {library_id}: {e}",
+                         exc_info=True)
+            if session is not None:
+                raise
+            return False
+        if result.rowcount == 0:
+            logger.info(f"Category {category_id} already associated with library entry {library_id}.")
+            return False
+        logger.success(f"Successfully added category {category_id} to library entry {library_id}.")
+        return True
+
+    async def remove_category_from_library_entry(
+            self, library_id: int, category_id: int, session: Optional[AsyncSession] = None
+    ) -> bool:
+        """
+        Remove a category from a library entry with a single DELETE on library_category.
+
+        Args:
+            library_id: The library entry to unlink.
+            category_id: The category to unlink it from.
+            session: Run in the caller's transaction instead of committing (see `transaction`),
+                     errors are raised then so the caller can roll back.
+
+        Returns:
+            True if the link was removed, False if it did not exist or the delete failed.
+        """
         logger.info(f"Attempting to remove category {category_id} from library entry {library_id}.")
-        async with self.session_maker() as session:
-            async with session.begin():
-                try:
-                    library_entry = await session.get(UserLibrary, library_id,
-                                                      options=[selectinload(UserLibrary.categories)])
-                    if not library_entry:
-                        logger.warning(f"Failed to remove category: Library entry {library_id} not found.")
-                        return False
-
-                    category = await session.get(UserCategory, category_id)
-                    if not category:
-                        logger.warning(f"Failed to remove category: Category {category_id} not found.")
-                        return False
-
-                    if category not in library_entry.categories:
-                        logger.info(f"Category {category_id} is not associated with library entry {library_id}.")
-                        return False  # Not associated
-
-                    library_entry.categories.remove(category)
-                    # await session.commit()
-                    logger.success(f"Successfully removed category {category_id} from library entry {library_id}.")
-                    return True
-                except Exception as e:
-                    logger.error(f"Error removing category {category_id} from library entry {library_id}: {e}",
-                                 exc_info=True)
-                    return False
+        stmt = delete(library_category).where(
+            library_category.c.library_id == library_id,
+            library_category.c.category_id == category_id
+        )
+        try:
+            async with self._unit_of_work(session) as active_session:
+                result = await active_session.execute(stmt)
+        except Exception as e:
+            logger.error(f"Error removing category {category_id} from library entry {library_id}: {e}",
+                         exc_info=True)
+            if session is not None:
+                raise
+            return False
+        if result.rowcount == 0:
+            logger.info(f"Category {category_id} is not associated with library entry {library_id}.")
+            return False
+        logger.success(f"Successfully removed category {category_id} from library entry {library_id}.")
+        return True
 
     async def get_library_entries_by_category(
-            self, user_id: int, category_id: int, media_type: Optional[MediaType] = None
+            self, user_id: int, category_id: int, media_type: Optional[MediaType] = None,
+            session: Optional[AsyncSession] = None
     ) -> Sequence[UserLibrary]:
         """Retrieve all library entries for a user in a specific category, optionally filtered by media type."""
         logger.info(f"Attempting to get library entries for user {user_id} in category {category_id}.")
@@ -457,18 +508,20 @@ class AsyncLibraryRepository:
             query = query.where(media_filter)
         query = query.options(selectinload(UserLibrary.categories))
 
-        async with self.session_maker() as session:
-            try:
-                result = await session.execute(query)
+        try:
+            async with self._unit_of_work(session) as active_session:
+                result = await active_session.execute(query)
                 entries = result.scalars().unique().all()  # Use unique() to prevent duplicates from join
-                logger.success(f"Found {len(entries)} library entries for user {user_id} in category {category_id}.")
-                return entries
-            except Exception as e:
-                logger.error(f"Error getting library entries for user {user_id} in category {category_id}: {e}",
-                             exc_info=True)
-                return []
-
-    async def get_all_categories(self, user_id: int) -> Sequence[UserCategory]:
+            logger.success(f"Found {len(entries)} library entries for user {user_id} in category {category_id}.")
+            return entries
+        except Exception as e:
+            logger.error(f"Error getting library entries for user {user_id} in category {category_id}: {e}",
+                         exc_info=True)
+            if session is not None:
+                raise
+            return []
+
+    async def get_all_categories(self, user_id: int, session: Optional[AsyncSession] = None) -> Sequence[UserCategory]:
         """Retrieve all categories for a user, sorted by position and creation date."""
         logger.info(f"Attempting to retrieve all categories for user {user_id}.")
 
@@ -484,19 +537,23 @@ class AsyncLibraryRepository:
             )
         )
 
-        async with self.session_maker() as session:
-            try:
-                result = await session.execute(query)
+        try:
+            async with self._unit_of_work(session) as active_session:
+                result = await active_session.execute(query)
                 categories = result.scalars().all()
-                logger.success(f"Retrieved {len(categories)} categories for user {user_id}.")
-                self.categories.clear()
-                self.categories = {category.name: category for category in categories}
-                return categories
-            except Exception as e:
-                logger.error(f"Error retrieving all categories for user {user_id}: {e}", exc_info=True)
-                return []
-
-    async def count_all_library_items(self, user_id: int, media_type: MediaType) -> int:
+            logger.success(f"Retrieved {len(categories)} categories for user {user_id}.")
+            self.categories.clear()
+            self.categories = {category.name: category for category in categories}
+            return categories
+        except Exception as e:
+            logger.error(f"Error retrieving all categories for user {user_id}: {e}", exc_info=True)
+            if session is not None:
+                raise
+            return []
+
+    async def count_all_library_items(
+            self, user_id: int, media_type: MediaType, session: Optional[AsyncSession] = None
+    ) -> int:
         """Count all library entries for a user by media type."""
         logger.info(f"Attempting to count all {media_type.name} library items for user {user_id}.")
         media_filter = UserLibrary.anime_id.is_not(
@@ -509,18 +566,22 @@ class AsyncLibraryRepository:
                 media_filter
             )
         )
-        async with self.session_maker() as session:
-            try:
-                result = await session.execute(query)
+        try:
+            async with self._unit_of_work(session) as active_session:
+                result = await active_session.execute(query)
                 count_result = result.scalar_one()
-                logger.success(f"Counted {count_result} {media_type.name} library items for user {user_id}.")
-                return count_result
-            except Exception as e:
-                logger.error(f"Error counting all {media_type.name} library items for user {user_id}: {e}",
-                             exc_info=True)
-                return 0
-
-    async def count_library_items_by_category(self, user_id: int, media_type: MediaType) -> Dict[int, int]:
+            logger.success(f"Counted {count_result} {media_type.name} library items for user {user_id}.")
+            return count_result
+        except Exception as e:
+            logger.error(f"Error counting all {media_type.name} library items for user {user_id}: {e}",
+                         exc_info=True)
+            if session is not None:
+                raise
+            return 0
+
+    async def count_library_items_by_category(
+            self, user_id: int, media_type: MediaType, session: Optional[AsyncSession] = None
+    ) -> Dict[int, int]:
         """Count library entries per category for a user by media type."""
         logger.info(f"Attempting to count {media_type.name} library items per category for user {user_id}.")
         media_filter = UserLibrary.anime_id.is_not(
@@ -534,19 +595,23 @@ class AsyncLibraryRepository:
             )
             .group_by(library_category.c.category_id)
         )
-        async with self.session_maker() as session:
-            try:
-                result = await session.execute(query)
+        try:
+            async with self._unit_of_work(session) as active_session:
+                result = await active_session.execute(query)
                 counts = {category_id: count for category_id, count in result.all()}
-                logger.success(f"Counted {len(counts)} categories with {media_type.name} items for user {user_id}.")
-                logger.debug(f"Category counts: {counts}")
-                return counts
-            except Exception as e:
-                logger.error(f"Error counting {media_type.name} library items by category for user {user_id}: {e}",
-                             exc_info=True)
-                return {}
-
-    async def get_all_library(self, media_type: MediaType, include_categories: bool = True) -> Sequence[UserLibrary]:
+            logger.success(f"Counted {len(counts)} categories with {media_type.name} items for user {user_id}.")
+            logger.debug(f"Category counts: {counts}")
+            return counts
+        except Exception as e:
+            logger.error(f"Error counting {media_type.name} library items by category for user {user_id}: {e}",
+                         exc_info=True)
+            if session is not None:
+                raise
+            return {}
+
+    async def get_all_library(
+            self, media_type: MediaType, include_categories: bool = True, session: Optional[AsyncSession] = None
+    ) -> Sequence[UserLibrary]:
         """Retrieve all library entries across all users by media type, optionally including categories."""
         logger.info(f"Attempting to retrieve all {media_type.name} library entries across all users.")
         logger.debug(f"Include categories: {include_categories}")
@@ -555,18 +620,22 @@ class AsyncLibraryRepository:
         query = select(UserLibrary).where(media_filter)
         if include_categories:
             query = query.options(selectinload(UserLibrary.categories))
-        async with self.session_maker() as session:
-            try:
-                result = await session.execute(query)
+        try:
+            async with self._unit_of_work(session) as active_session:
+                result = await active_session.execute(query)
                 entries = result.scalars().all()
-                logger.success(f"Retrieved {len(entries)} {media_type.name} library entries across all users.")
-                return entries
-            except Exception as e:
-                logger.error(f"Error retrieving all {media_type.name} library entries across all users: {e}",
-                             exc_info=True)
-                return []
-
-    async def get_user_library_entries(self, user_id: int, media_type: MediaType) -> Sequence[UserLibrary]:
+            logger.success(f"Retrieved {len(entries)} {media_type.name} library entries across all users.")
+            return entries
+        except Exception as e:
+            logger.error(f"Error retrieving all {media_type.name} library entries across all users: {e}",
+                         exc_info=True)
+            if session is not None:
+                raise
+            return []
+
+    async def get_user_library_entries(
+            self, user_id: int, media_type: MediaType, session: Optional[AsyncSession] = None
+    ) -> Sequence[UserLibrary]:
         logger.info(f"Fetching {media_type.name} library entries for user {user_id}.")
         media_filter = UserLibrary.anime_id.is_not(
             None) if media_type == MediaType.ANIME else UserLibrary.manga_id.is_not(None)
@@ -576,16 +645,17 @@ class AsyncLibraryRepository:
             media_filter
         )
 
-        async with self.session_maker() as session:
-            try:
-                async with session.begin():
-                    result = await session.execute(query)
-                    entries = result.scalars().all()
-                    logger.success(f"Found {len(entries)} {media_type.name} entries.")
-                    return entries
-            except Exception as e:
-                logger.error(f"Error fetching library entries: {e}", exc_info=True)
-                return []
+        try:
+            async with self._unit_of_work(session) as active_session:
+                result = await active_session.execute(query)
+                entries = result.scalars().all()
+            logger.success(f"Found {len(entries)} {media_type.name} entries.")
+            return entries
+        except Exception as e:
+            logger.error(f"Error fetching library entries: {e}", exc_info=True)
+            if session is not None:
+                raise
+            return []
 
     async def get_by_advanced_filters(
             self,
@@ -609,14 +679,18 @@ class AsyncLibraryRepository:
             sort_by: Optional[SortBy] = SortBy.POPULARITY,
             order: SortOrder = SortOrder.DESC,
             limit: int = 10,
-            offset: int = 0
+            offset: int = 0,
+            after_value=None,
+            after_id: Optional[int] = None,
+            session: Optional[AsyncSession] = None
     ) -> Union[List[Anime], List[Manga]]:
         logger.info(f"Filtering {media_type.name} results for user {user_id}'s library.")
         library_entries = []
         if category_id:
-            library_entries = await self.get_library_entries_by_category(user_id, category_id, media_type)
+            library_entries = await self.get_library_entries_by_category(user_id, category_id, media_type,
+                                                                         session=session)
         else:
-            library_entries = await self.get_user_library_entries(user_id, media_type)
+            library_entries = await self.get_user_library_entries(user_id, media_type, session=session)
         media_ids = list(filter(None, map(self.get_library_entry_id, library_entries)))
 
         if not media_ids:
@@ -645,7 +719,9 @@ class AsyncLibraryRepository:
             sort_by=sort_by,
             order=order,
             limit=limit,
-            offset=offset
+            offset=offset,
+            after_value=after_value,
+            after_id=after_id
         )
 
 
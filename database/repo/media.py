@@ -1,21 +1,30 @@
+from contextlib import asynccontextmanager, nullcontext
 from enum import Enum
-from typing import Sequence, Union, Optional, List
+from itertools import islice
+from typing import Sequence, Union, Optional, List, Iterable, AsyncIterator
 
 # from cachetools.func import lru_cache, lfu_cache
 from functools import lru_cache
 
 from cachetools import LFUCache
 from loguru import logger
-from sqlalchemy import select, and_, or_, func, between, not_, asc, desc
+from sqlalchemy import select, and_, or_, func, between, not_, asc, desc, delete, insert, update, inspect, tuple_, \
+    bindparam
 from sqlalchemy.sql import func
-from sqlalchemy.exc import SQLAlchemyError, DatabaseError, ProgrammingError
+from sqlalchemy.exc import SQLAlchemyError, DatabaseError, ProgrammingError, IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import sessionmaker, selectinload
+from sqlalchemy.orm import sessionmaker, lazyload
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.schema import Table
 
 from database import get_enum_index
-from database.models import Anime, Manga, Genre, Tag, Studio
+from database.convert import anilist_to_media_rows
+from database.models import Anime, Manga, Genre, Tag, Studio, Trailer, MediaCharacter, Base, strict_load, search_filter, \
+    UserLibrary, WatchHistory, Episode, Chapter, Bookmark, MediaRelation, library_category, ANIME_LIST_OPTIONS, \
+    MANGA_LIST_OPTIONS, ANIME_DETAIL_OPTIONS, MANGA_DETAIL_OPTIONS
 
-from AnillistPython import MediaType, MediaStatus, MediaFormat, MediaSource, MediaSeason
+from AnillistPython import MediaType, MediaStatus, MediaFormat, MediaSource, MediaSeason, AnilistMedia
 
 
 class SortBy(str, Enum):
@@ -48,6 +57,19 @@ class GroupByField(str, Enum):
     SOURCE = "source_material_id"
     IS_ADULT = "isAdult"
 
+# columns update() may set, built once: relationships, 'id' and unknown keys in update data are skipped
+UPDATABLE_COLUMNS = {
+    model: frozenset(model.__table__.columns.keys()) - {"id"}
+    for model in (Anime, Manga)
+}
+
+# get_by_id statements built once and executed with {"media_id": ...}, instead of a new select per call
+SELECT_BY_ID = {
+    model: select(model).where(model.id == bindparam("media_id")).options(*strict_load(*options))
+    for model, options in ((Anime, ANIME_DETAIL_OPTIONS), (Manga, MANGA_DETAIL_OPTIONS))
+}
+
+
 class AsyncMediaRepository:
     def __init__(self, session: sessionmaker):
         self.session_maker = session
@@ -55,6 +77,22 @@ class AsyncMediaRepository:
         self.tag_cache = LFUCache(maxsize=100)
         self.studio_cache = LFUCache(maxsize=100)
 
+    async def _get_many(self, cache: LFUCache, model, ref_ids: List[int]) -> dict:
+        """Reference rows by id from cache, the misses are fetched together in one query and cached."""
+        found = {}
+        missing = []
+        for ref_id in ref_ids:
+            if ref_id in cache:
+                found[ref_id] = cache[ref_id]
+            else:
+                missing.append(ref_id)
+        if missing:
+            async with self.session_maker() as session:
+                result = await session.execute(select(model).where(model.id.in_(missing)))
+                for ref in result.scalars():
+                    cache[ref.id] = found[ref.id] = ref
+        return found
+
     async def get_genre(self, genre_id):
         # Check if the genre is in the cache
         if genre_id in self.genre_cache:
@@ -96,19 +134,26 @@ class AsyncMediaRepository:
         associated_studios = []
 
         try:
+            # one query per reference type for the ids not cached yet, instead of one per item
+            genres = await self._get_many(self.genre_cache, Genre, [genre.id for genre in media.genres])
+            tags = await self._get_many(self.tag_cache, Tag, [tag.id for tag in media.tags])
+            studios = await self._get_many(self.studio_cache, Studio, [studio.id for studio in media.studios])
+            # cached rows are detached (loaded by other sessions), merge(load=False) hands back this session's
+            # instance for the row, the one eager loaded with the media when present, without a query
+
             for genre in media.genres:
-                existing_genre = await self.get_genre(genre.id)
+                existing_genre = genres.get(genre.id)
                 if existing_genre:
-                    associated_genres.append(existing_genre)
+                    associated_genres.append(await session.merge(existing_genre, load=False))
                 else:
                     new_genre = Genre(id=genre.id, name=genre.name)
                     session.add(new_genre)
                     associated_genres.append(new_genre)
 
             for tag in media.tags:
-                existing_tag = await self.get_tag(tag.id)
+                existing_tag = tags.get(tag.id)
                 if existing_tag:
-                    associated_tags.append(existing_tag)
+                    associated_tags.append(await session.merge(existing_tag, load=False))
                 else:
                     new_tag = Tag(id=tag.id, name=tag.name, isAdult= tag.isAdult,
                                 description=tag.description or "", category=tag.category)
@@ -116,9 +161,9 @@ class AsyncMediaRepository:
                     associated_tags.append(new_tag)
 
             for studio in media.studios:
-                existing_studio = await self.get_studio(studio.id)
+                existing_studio = studios.get(studio.id)
                 if existing_studio:
-                    associated_studios.append(existing_studio)
+                    associated_studios.append(await session.merge(existing_studio, load=False))
                 else:
                     new_studio = Studio(id=studio.id, name=studio.name)
                     session.add(new_studio)
@@ -136,20 +181,268 @@ class AsyncMediaRepository:
 
 
     ### Create
-    async def create(self, media: Union[Anime, Manga]) -> Union[Anime, Manga]:
-        """Create a new media entry"""
+    @staticmethod
+    def _mark_inserted(media: Union[Anime, Manga]) -> None:
+        """
+        Mark the column attributes left unset on a flushed media as loaded.
+
+        The INSERT writes NULL for them (media columns have no server defaults), so setting None
+        gives the same state as a refresh without reading the row back, and later access does not
+        trigger a lazy load outside the session.
+        """
+        state = inspect(media)
+        unloaded = state.unloaded
+        for column_attr in state.mapper.column_attrs:
+            if column_attr.key in unloaded and column_attr.columns[0].server_default is None:
+                set_committed_value(media, column_attr.key, None)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[AsyncSession]:
+        """
+        Group writes in one transaction, committed once on exit and rolled back on error.
+
+        Pass the yielded session to create/update/delete/attach_*: methods given a session run in the
+        caller's transaction and never commit, the caller owns the unit of work.
+
+        Example:
+            async with repo.transaction() as session:
+                for media in medias:
+                    await repo.create(media, session=session)
+        """
+        async with self.session_maker() as session:
+            async with session.begin():
+                yield session
+
+    def _unit_of_work(self, session: Optional[AsyncSession]):
+        """The caller's session as is, otherwise a new transaction committed when the method is done."""
+        return nullcontext(session) if session is not None else self.transaction()
+
+    async def create(self, media: Union[Anime, Manga], session: Optional[AsyncSession] = None) -> Union[Anime, Manga]:
+        """Create a new media entry, in the caller's transaction when session is given (see `transaction`)."""
+        async with self._unit_of_work(session) as session:
+            try:
+                media = await self.get_associated(session, media)
+                session.add(media)
+                await session.flush()
+                self._mark_inserted(media)
+                logger.success(f"Media '{media.id}' created.")
+            except SQLAlchemyError as e:
+                logger.error(f"Error creating media: {e}")
+                raise
+        return media
+
+    ASSOCIATION_KINDS = ("genre", "tag", "studio")
+
+    @staticmethod
+    def _association_table(media_type: MediaType, kind: str) -> Table:
+        prefix = "anime" if media_type == MediaType.ANIME else "manga"
+        return Base.metadata.tables[f"{prefix}_{kind}_association"]
+
+    async def _attach(self, media_type: MediaType, kind: str, links: List[dict],
+                      session: Optional[AsyncSession] = None) -> None:
+        """Insert association rows with one executemany statement, links that already exist are ignored."""
+        if not links:
+            return
+        stmt = sqlite_insert(self._association_table(media_type, kind)).prefix_with("OR IGNORE")
+        async with self._unit_of_work(session) as session:
+            try:
+                await session.execute(stmt, links)
+            except SQLAlchemyError as e:
+                logger.error(f"Error attaching {kind}s to {media_type.value}: {e}")
+                raise
+
+    async def attach_genres(self, media_id: int, genre_ids: Iterable[int], media_type: MediaType,
+                            session: Optional[AsyncSession] = None) -> None:
+        """Link genres to a media in one statement."""
+        media_key = "anime_id" if media_type == MediaType.ANIME else "manga_id"
+        await self._attach(media_type, "genre", [{media_key: media_id, "genre_id": ref_id} for ref_id in genre_ids],
+                           session)
+
+    async def attach_tags(self, media_id: int, tag_ids: Iterable[int], media_type: MediaType,
+                          session: Optional[AsyncSession] = None) -> None:
+        """Link tags to a media in one statement."""
+        media_key = "anime_id" if media_type == MediaType.ANIME else "manga_id"
+        await self._attach(media_type, "tag", [{media_key: media_id, "tag_id": ref_id} for ref_id in tag_ids],
+                           session)
+
+    async def attach_studios(self, media_id: int, studio_ids: Iterable[int], media_type: MediaType,
+                             session: Optional[AsyncSession] = None) -> None:
+        """Link studios to a media in one statement."""
+        media_key = "anime_id" if media_type == MediaType.ANIME else "manga_id"
+        await self._attach(media_type, "studio",
+                           [{media_key: media_id, "studio_id": ref_id} for ref_id in studio_ids], session)
+
+    async def create_many(self, rows: Iterable[dict], media_type: MediaType,
+                          batch_size: int = 1000) -> List[Union[Anime, Manga]]:
+        """
+        Insert media rows with INSERT ... RETURNING in one transaction, returning the created objects.
+
+        Rows are column values (see `convert.media_column_values`), consumed from the iterable
+        batch_size at a time so a generator is never materialized as a whole. SQLAlchemy sends each
+        batch as multi row INSERT statements (insertmanyvalues) instead of one statement per row.
+        Optional "genre_ids", "tag_ids" and "studio_ids" lists are popped from the row dicts and
+        linked with one statement per association table and batch.
+
+        Args:
+            rows: Column dicts of a single media type.
+            media_type: The type of media (Anime or Manga).
+            batch_size: Number of rows taken from rows per executemany call.
+
+        Returns:
+            Created Anime or Manga objects, relationships are not loaded.
+        """
+        model = Anime if media_type == MediaType.ANIME else Manga
+        media_key = "anime_id" if media_type == MediaType.ANIME else "manga_id"
+        # created rows have no related rows yet, skip the default eager loaders on the returned objects
+        stmt = insert(model).returning(model).options(lazyload("*"))
+        rows = iter(rows)
+        created = []
         async with self.session_maker() as session:
             async with session.begin():
                 try:
-                    media = await self.get_associated(session, media)
-                    session.add(media)
-                    await session.flush()
-                    await session.refresh(media)
-                    logger.success(f"Media '{media.id}' created.")
+                    while batch := list(islice(rows, batch_size)):
+                        links = {kind: [] for kind in self.ASSOCIATION_KINDS}
+                        for row in batch:
+                            for kind, kind_links in links.items():
+                                ref_ids = row.pop(f"{kind}_ids", None)
+                                if ref_ids:
+                                    ref_key = f"{kind}_id"
+                                    kind_links.extend({media_key: row["id"], ref_key: ref_id} for ref_id in ref_ids)
+
+                        result = await session.scalars(stmt, batch)
+                        created.extend(result.all())
+                        for kind, kind_links in links.items():
+                            await self._attach(media_type, kind, kind_links, session)
                 except SQLAlchemyError as e:
-                    logger.error(f"Error creating media: {e}")
+                    logger.error(f"Error creating {media_type.value}(s): {e}")
+                    raise
+        logger.success(f"Created {len(created)} {media_type.value}(s).")
+        return created
+
+    async def bulk_create(self, records: List[AnilistMedia], media_type: MediaType) -> int:
+        """
+        Insert many Anilist records in one transaction using Core executemany inserts.
+
+        Rows that already exist are ignored (INSERT OR IGNORE), so this is meant for catalog
+        ingest, use `create_update_media` or `bulk_upsert` to update existing entries. Trailers and
+        character links only have surrogate keys, they are written for media that did not exist yet.
+
+        Args:
+            records: Anilist media records of a single media type.
+            media_type: The type of media (Anime or Manga).
+
+        Returns:
+            Number of media records submitted.
+        """
+        if not records:
+            return 0
+
+        model = Anime if media_type == MediaType.ANIME else Manga
+        media_key = "anime_id" if media_type == MediaType.ANIME else "manga_id"
+        child_tables = {Trailer.__tablename__, MediaCharacter.__tablename__}
+        rows_by_table = anilist_to_media_rows(records, media_type)
+        media_ids = [row["id"] for row in rows_by_table[model.__tablename__]]
+        async with self.session_maker() as session:
+            async with session.begin():
+                try:
+                    # OR IGNORE can't spot duplicate child rows (surrogate keys), skip those of existing media
+                    existing = set(await session.scalars(select(model.id).where(model.id.in_(media_ids))))
+                    # dict order: reference tables, media, then rows referencing them
+                    for table_name, rows in rows_by_table.items():
+                        if existing and table_name in child_tables:
+                            rows = [row for row in rows if row[media_key] not in existing]
+                        if not rows:
+                            continue
+                        table = Base.metadata.tables[table_name]
+                        await session.execute(sqlite_insert(table).prefix_with("OR IGNORE"), rows)
+                        logger.debug(f"Inserted (or ignored) {len(rows)} rows into '{table_name}'")
+                except SQLAlchemyError as e:
+                    logger.error(f"Error bulk creating {media_type.value}: {e}")
+                    raise
+        logger.success(f"Bulk created {len(records)} {media_type.value}(s).")
+        return len(records)
+
+    async def bulk_upsert(self, records: List[AnilistMedia], media_type: MediaType, batch_size: int = 1000) -> int:
+        """
+        Insert or update many Anilist records using Core executemany statements, one transaction per batch.
+
+        Existing media rows are updated in place, a None value keeps the stored one (same as
+        `create_update_media`). Trailers and character links of the batch are replaced, reference
+        and association rows that already exist are ignored. A batch that hits a unique constraint
+        other than the id (title, idMal, site_url) is written again record by record, the conflicting
+        records are logged and skipped.
+
+        Args:
+            records: Anilist media records of a single media type.
+            media_type: The type of media (Anime or Manga).
+            batch_size: Number of records converted and written per transaction.
+
+        Returns:
+            Number of media records written.
+        """
+        if not records:
+            return 0
+
+        written = 0
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            try:
+                await self._upsert_batch(batch, media_type)
+                written += len(batch)
+                continue
+            except IntegrityError as e:
+                if len(batch) > 1:
+                    logger.warning(f"Bulk upsert of {len(batch)} {media_type.value}(s) hit a constraint, "
+                                   f"retrying record by record: {e.orig}")
+                else:
+                    logger.error(f"Skipping {media_type.value} {batch[0].id}: {e.orig}")
+                    continue
+            for record in batch:
+                try:
+                    await self._upsert_batch([record], media_type)
+                    written += 1
+                except IntegrityError as e:
+                    logger.error(f"Skipping {media_type.value} {record.id}: {e.orig}")
+        logger.success(f"Bulk upserted {written} of {len(records)} {media_type.value}(s).")
+        return written
+
+    async def _upsert_batch(self, batch: List[AnilistMedia], media_type: MediaType) -> None:
+        """Write the rows of a batch of records in one transaction, rolled back as a whole on error."""
+        model = Anime if media_type == MediaType.ANIME else Manga
+        media_key = "anime_id" if media_type == MediaType.ANIME else "manga_id"
+        media_table = model.__table__
+        child_tables = (Trailer.__table__, MediaCharacter.__table__)
+
+        rows_by_table = anilist_to_media_rows(batch, media_type)
+        media_ids = [row["id"] for row in rows_by_table[media_table.name]]
+        async with self.session_maker() as session:
+            async with session.begin():
+                try:
+                    # child rows have surrogate keys, OR IGNORE can't spot duplicates so replace them
+                    for table in child_tables:
+                        await session.execute(delete(table).where(table.c[media_key].in_(media_ids)))
+
+                    for table_name, rows in rows_by_table.items():
+                        if not rows:
+                            continue
+                        table = Base.metadata.tables[table_name]
+                        if table is media_table:
+                            stmt = sqlite_insert(table)
+                            stmt = stmt.on_conflict_do_update(
+                                index_elements=[table.c.id],
+                                set_={key: func.coalesce(stmt.excluded[key], table.c[key])
+                                      for key in rows[0] if key != "id"},
+                            )
+                        else:
+                            stmt = sqlite_insert(table).prefix_with("OR IGNORE")
+                        await session.execute(stmt, rows)
+                        logger.debug(f"Upserted {len(rows)} rows into '{table_name}'")
+                except IntegrityError:
+                    # unique key conflicts are retried record by record by bulk_upsert
+                    raise
+                except SQLAlchemyError as e:
+                    logger.error(f"Error bulk upserting {media_type.value}: {e}")
                     raise
-            return media
 
     async def create_update_media(self, media: Union[Anime, Manga]) -> Union[Anime, Manga]:
         """Create or update a media entry with associated genres, tags, and studios."""
@@ -222,7 +515,7 @@ class AsyncMediaRepository:
 
         async with self.session_maker() as session:
             try:
-                result = await session.execute(select(model).filter(model.id == media_id))
+                result = await session.execute(SELECT_BY_ID[model], {"media_id": media_id})
                 media_item = result.scalars().first()
 
                 if media_item:
@@ -240,8 +533,9 @@ class AsyncMediaRepository:
     async def update(
             self,
             media_id: int,
-            update_data: Union[Anime, Manga],
-            media_type: MediaType
+            update_data: Union[Anime, Manga, dict],
+            media_type: MediaType,
+            session: Optional[AsyncSession] = None
     ) -> Optional[Union[Anime, Manga]]:
         """
         Update media by ID and type with logging.
@@ -249,68 +543,67 @@ class AsyncMediaRepository:
         Args:
             self: The instance of the class containing the session_maker.
             media_id: The ID of the media to update.
-            update_data: An object (Anime or Manga) containing the fields to update.
-                         Only non-None attributes from update_data will be applied.
+            update_data: An object (Anime or Manga) or a dict of column values containing the fields to update.
+                         Only non-None values of updatable columns (see UPDATABLE_COLUMNS) are applied, in a
+                         single UPDATE ... RETURNING statement.
             media_type: The type of media (Anime or Manga).
+            session: Run in the caller's transaction instead of committing (see `transaction`),
+                     errors are raised then so the caller can roll back.
 
         Returns:
             The updated Anime or Manga object if successful, otherwise None.
         """
         logger.info(f"Attempting to update {media_type.value} with ID: {media_id}")
-        logger.debug(f"Update data provided: {update_data.__dict__}")
+        data = update_data if isinstance(update_data, dict) else update_data.__dict__
+        logger.debug(f"Update data provided: {data}")
 
-        media = await self.get_by_id(media_id, media_type)
-        if not media:
-            logger.warning(f"Update failed: {media_type.value} with ID {media_id} not found.")
-            return None
-
-        logger.debug(f"Found existing media: {media}")
-
-        # Start a new session for the update operation.
-        # It's crucial to perform updates within a transaction.
-        async with self.session_maker() as session:
-            try:
-                # Re-attach the media object to the new session if it came from a different session
-                # or if it's a detached instance.
-                # The get_by_id method implicitly uses a new session, so 'media' might be detached.
-                # Using session.merge() is a safe way to re-attach or get a managed instance.
-                media = await session.merge(media)
-                logger.debug(f"Media object merged into current session for update: {media.id}")
-
-                updated_fields_count = 0
-                for key, value in update_data.__dict__.items():
-                    # Ignore 'id' and any attributes that are None in update_data
-                    # Also, avoid updating internal SQLAlchemy state attributes (start with '_sa_')
-                    if key != "id" and value is not None and not key.startswith('_sa_'):
-                        current_value = getattr(media, key, None)
-                        if current_value != value:  # Only update if value has changed
-                            setattr(media, key, value)
-                            updated_fields_count += 1
-                            logger.debug(f"Updated field '{key}' from '{current_value}' to '{value}'")
-
-                if updated_fields_count == 0:
-                    logger.info(
-                        f"No fields to update for {media_type.value} with ID {media_id}. Returning original media.")
-                    return media  # No changes were made
-
-                await session.commit()  # Commit the changes to the database
-                await session.refresh(
-                    media)  # Refresh the object to get any database-generated updates (e.g., updated_at)
-                logger.info(f"Successfully updated {media_type.value} with ID {media_id}.")
-                return media
-            except SQLAlchemyError as e:
-                await session.rollback()  # Rollback on error
-                logger.error(f"SQLAlchemy Error during update for {media_type.value} with ID {media_id}: {e}",
-                             exc_info=True)
-                return None
-            except Exception as e:
-                await session.rollback()  # Rollback on other errors
-                logger.error(
-                    f"An unexpected error occurred during update for {media_type.value} with ID {media_id}: {e}",
-                    exc_info=True)
+        model = Anime if media_type == MediaType.ANIME else Manga
+        updatable = UPDATABLE_COLUMNS[model]
+        # None values are not applied, '_sa_' keys (instance state) and 'id' fall out with the whitelist
+        values = {key: data[key] for key in data.keys() & updatable if data[key] is not None}
+        skipped = {key for key in data.keys() - updatable if key != "id" and not key.startswith('_sa_')}
+        if skipped:
+            logger.warning(f"Skipping {sorted(skipped)}, only column values are updated, use create_update_media "
+                           f"for related rows.")
+
+        if not values:
+            logger.info(f"No fields to update for {media_type.value} with ID {media_id}. Returning original media.")
+            return await self.get_by_id(media_id, media_type)
+
+        # one UPDATE ... RETURNING instead of loading the row, merging and refreshing it
+        # populate_existing: a caller's session may already hold the row, overwrite it with the returned values
+        options = ANIME_DETAIL_OPTIONS if model is Anime else MANGA_DETAIL_OPTIONS
+        stmt = (
+            update(model)
+            .where(model.id == media_id)
+            .values(**values)
+            .returning(model)
+            .options(*strict_load(*options))
+            .execution_options(synchronize_session=False, populate_existing=True)
+        )
+        try:
+            async with self._unit_of_work(session) as active_session:
+                media = (await active_session.scalars(stmt)).first()
+            if media is None:
+                logger.warning(f"Update failed: {media_type.value} with ID {media_id} not found.")
                 return None
+            logger.info(f"Successfully updated {len(values)} field(s) of {media_type.value} with ID {media_id}.")
+            return media
+        except SQLAlchemyError as e:
+            logger.error(f"SQLAlchemy Error during update for {media_type.value} with ID {media_id}: {e}",
+                         exc_info=True)
+            if session is not None:
+                raise
+            return None
+        except Exception as e:
+            logger.error(
+                f"An unexpected error occurred during update for {media_type.value} with ID {media_id}: {e}",
+                exc_info=True)
+            if session is not None:
+                raise
+            return None
 
-    async def delete(self, media_id: int, media_type: MediaType) -> bool:
+    async def delete(self, media_id: int, media_type: MediaType, session: Optional[AsyncSession] = None) -> bool:
         """
         Delete media by ID and type with logging.
 
@@ -318,40 +611,68 @@ class AsyncMediaRepository:
             self: The instance of the class containing the session_maker.
             media_id: The ID of the media to delete.
             media_type: The type of media (Anime or Manga).
+            session: Run in the caller's transaction instead of committing (see `transaction`),
+                     errors are raised then so the caller can roll back.
 
         Returns:
             True if the media was successfully deleted, False otherwise.
         """
         logger.info(f"Attempting to delete {media_type.value} with ID: {media_id}")
 
-        media = await self.get_by_id(media_id, media_type)
-        if not media:
-            logger.warning(f"Delete failed: {media_type.value} with ID {media_id} not found.")
-            return False
-
-        logger.debug(f"Found media for deletion: {media}")
+        model = Anime if media_type == MediaType.ANIME else Manga
+        media_key = "anime_id" if media_type == MediaType.ANIME else "manga_id"
+        prefix = "anime" if media_type == MediaType.ANIME else "manga"
+        # rows referencing the media, removed first in the same transaction (the foreign keys have no ON DELETE
+        # CASCADE, and existing databases would not pick one up), children of children before their parents
+        if media_type == MediaType.ANIME:
+            units = select(Episode.id).where(Episode.anime_id == media_id)
+            bookmarks = delete(Bookmark).where(Bookmark.episode_id.in_(units))
+            unit_rows = delete(Episode).where(Episode.anime_id == media_id)
+        else:
+            units = select(Chapter.id).where(Chapter.manga_id == media_id)
+            bookmarks = delete(Bookmark).where(Bookmark.chapter_id.in_(units))
+            unit_rows = delete(Chapter).where(Chapter.manga_id == media_id)
+        entries = select(UserLibrary.id).where(getattr(UserLibrary, media_key) == media_id)
+        statements = [
+            bookmarks,
+            unit_rows,
+            delete(library_category).where(library_category.c.library_id.in_(entries)),
+            delete(UserLibrary).where(getattr(UserLibrary, media_key) == media_id),
+            delete(WatchHistory).where(getattr(WatchHistory, media_key) == media_id),
+            delete(MediaRelation).where(or_(getattr(MediaRelation, f"from_{media_key}") == media_id,
+                                            getattr(MediaRelation, f"to_{media_key}") == media_id)),
+        ]
+        child_tables = [self._association_table(media_type, kind) for kind in self.ASSOCIATION_KINDS]
+        child_tables += [Base.metadata.tables[f"{prefix}_character_association"], Trailer.__table__,
+                         MediaCharacter.__table__]
+        statements += [delete(table).where(table.c[media_key] == media_id) for table in child_tables]
 
-        async with self.session_maker() as session:
-            try:
-                # Re-attach the media object to the new session if it came from a different session
-                media = await session.merge(media)
-                logger.debug(f"Media object merged into current session for deletion: {media.id}")
-
-                await session.delete(media)
-                await session.commit()  # Commit the deletion
-                logger.info(f"Successfully deleted {media_type.value} with ID {media_id}.")
-                return True
-            except SQLAlchemyError as e:
-                await session.rollback()  # Rollback on error
-                logger.error(f"SQLAlchemy Error during delete for {media_type.value} with ID {media_id}: {e}",
-                             exc_info=True)
-                return False
-            except Exception as e:
-                await session.rollback()  # Rollback on other errors
-                logger.error(
-                    f"An unexpected error occurred during delete for {media_type.value} with ID {media_id}: {e}",
-                    exc_info=True)
+        try:
+            async with self._unit_of_work(session) as active_session:
+                for statement in statements:
+                    await active_session.execute(statement.execution_options(synchronize_session=False))
+                # a single DELETE, its rowcount tells whether the media existed
+                result = await active_session.execute(
+                    delete(model).where(model.id == media_id).execution_options(synchronize_session=False)
+                )
+            if result.rowcount == 0:
+                logger.warning(f"Delete failed: {media_type.value} with ID {media_id} not found.")
                 return False
+            logger.info(f"Successfully deleted {media_type.value} with ID {media_id}.")
+            return True
+        except SQLAlchemyError as e:
+            logger.error(f"SQLAlchemy Error during delete for {media_type.value} with ID {media_id}: {e}",
+                         exc_info=True)
+            if session is not None:
+                raise
+            return False
+        except Exception as e:
+            logger.error(
+                f"An unexpected error occurred during delete for {media_type.value} with ID {media_id}: {e}",
+                exc_info=True)
+            if session is not None:
+                raise
+            return False
 
     async def get_all(self, media_type: MediaType) -> Sequence[Union[Anime, Manga]]:
         """
@@ -371,7 +692,8 @@ class AsyncMediaRepository:
 
         async with self.session_maker() as session:
             try:
-                query = select(model)
+                options = ANIME_LIST_OPTIONS if model is Anime else MANGA_LIST_OPTIONS
+                query = select(model).options(*strict_load(*options))
                 logger.debug(f"Executing query to get all {media_type.value}.")
                 result = await session.execute(query)
                 media_items = result.scalars().all()
@@ -417,6 +739,21 @@ class AsyncMediaRepository:
                 logger.error(f"An unexpected error occurred during count for {media_type.value}: {e}", exc_info=True)
                 return 0
 
+    @staticmethod
+    def _keyset_filter(sort_column, id_column, after_value, after_id: int, ascending: bool):
+        """
+        Rows after (after_value, after_id) in (sort_column, id) order, SQLite sorts NULL first
+        ascending and last descending.
+        """
+        after = tuple_(sort_column, id_column)
+        if after_value is None:
+            # on the NULL sort values: remaining NULL rows, then (ascending) every non NULL row
+            null_rows = and_(sort_column.is_(None), id_column > after_id if ascending else id_column < after_id)
+            return or_(null_rows, sort_column.is_not(None)) if ascending else null_rows
+        if ascending:
+            return after > tuple_(after_value, after_id)
+        return or_(after < tuple_(after_value, after_id), sort_column.is_(None))
+
     async def get_by_advanced_filters(
             self,
             media_type: MediaType,
@@ -438,8 +775,17 @@ class AsyncMediaRepository:
             sort_by: Optional[SortBy] = SortBy.POPULARITY,
             order: SortOrder = SortOrder.DESC,
             limit: int = 10,
-            offset: int = 0
+            offset: int = 0,
+            after_value=None,
+            after_id: Optional[int] = None
     ) -> Union[List[Anime], List[Manga]]:
+        """
+        Filter media, rows are ordered by sort_by then id.
+
+        Pages are taken with limit/offset, or with keyset pagination by passing the sort value and id of
+        the last row of the previous page as after_value/after_id. Keyset pages seek through the sort
+        index instead of reading and dropping offset rows, offset is ignored then.
+        """
         logger.info(f"Applying advanced filters for {media_type.value}")
         logger.debug(f"Active filters: query={query}, score={min_score}-{max_score}, count={min_count}-{max_count}, "
                      f"duration={min_duration}-{max_duration}, year={start_year}-{end_year}, genres={genres}, "
@@ -461,15 +807,7 @@ class AsyncMediaRepository:
 
         # Query filter
         if query:
-            filters.append(
-                or_(
-                    model.title_english.ilike(f"%{query}%"),
-                    model.title_romaji.ilike(f"%{query}%"),
-                    model.title_native.ilike(f"%{query}%"),
-                    model.description.ilike(f"%{query}%"),
-                    model.synonyms.ilike(f"%{query}%")  # if synonyms is a searchable text field
-                )
-            )
+            filters.append(search_filter(model, query))
 
         # Score filter
         if min_score is not None or max_score is not None:
@@ -536,8 +874,15 @@ class AsyncMediaRepository:
         query = select(model)
         if genres:
             genre_conditions = [Genre.name.ilike(f"%{genre}%") for genre in genres]
-            filters.append(or_(*genre_conditions))
-            query = query.join(model.genres)
+            # semi join on the association reverse index (genre_id, media_id): a media matching several genres
+            # stays one row, so limit counts media, not media x genre rows
+            genre_links = self._association_table(media_type, "genre")
+            media_key = "anime_id" if media_type == MediaType.ANIME else "manga_id"
+            filters.append(model.id.in_(
+                select(genre_links.c[media_key]).where(
+                    genre_links.c.genre_id.in_(select(Genre.id).where(or_(*genre_conditions)))
+                )
+            ))
 
         # Media ID filter
         if media_ids:
@@ -586,9 +931,15 @@ class AsyncMediaRepository:
         if sort_column is None:
             logger.warning(f"Invalid sort column {sort_by} for {media_type.value}, defaulting to popularity")
             sort_column = model.popularity
-        query = query.order_by(asc(sort_column) if order == SortOrder.ASC else desc(sort_column))
+        ascending = order == SortOrder.ASC
+        direction = asc if ascending else desc
+        # id breaks ties so pages are stable
+        query = query.order_by(direction(sort_column), direction(model.id))
 
         # Limit and offset
+        if after_id is not None:
+            query = query.where(self._keyset_filter(sort_column, model.id, after_value, after_id, ascending))
+            offset = 0
         query = query.limit(limit).offset(offset)
 
         async with self.session_maker() as session:
@@ -596,7 +947,8 @@ class AsyncMediaRepository:
                 # count_query = select(func.count()).select_from(query.subquery())
                 # count_result = await session.execute(count_query)
                 # total_count = count_result.scalar()
-                query = query.options(selectinload(model.genres))
+                # rows feed media cards and are handed to the media page as is
+                query = query.options(*strict_load(*(ANIME_LIST_OPTIONS if model is Anime else MANGA_LIST_OPTIONS)))
 
                 result = await session.execute(query)
                 media_items = result.scalars().unique().all()
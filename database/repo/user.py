@@ -1,5 +1,4 @@
 import asyncio
-import datetime
 from typing import Optional, Any, Coroutine
 
 from sqlalchemy import select, and_
@@ -162,15 +161,12 @@ async def update_user(
             logger.error(f"Error: Cannot update name. User with name '{name}' already exists.")
             return None
         user.name = name
-        user.updated_at = datetime.datetime.now(datetime.UTC) # Manually update timestamp if not auto-handled
 
     if email is not None and email != user.email:
         user.email = email
-        user.updated_at = datetime.datetime.now(datetime.UTC)
 
     if password_hash is not None:
         user.password_hash = password_hash
-        user.updated_at = datetime.datetime.now(datetime.UTC)
 
     # Update UserProfile fields or create a new profile if it doesn't exist
     if user.profile:
@@ -18,13 +18,12 @@ from qfluentwidgets import SearchLineEdit, PopUpAniStackedWidget, SegmentedWidge
     FlyoutAnimationType
 from PySide6.QtWidgets import QVBoxLayout, QHBoxLayout, QWidget, QApplication, QButtonGroup, QPushButton, QGroupBox, \
     QGridLayout
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from AnillistPython import MediaType, parse_searched_media, MediaStatus, MediaFormat, MediaSeason, MediaGenre
 from core import ImageDownloader
 from database import AsyncLibraryRepository, init_db, AsyncMediaRepository, UserCategory, SortBy, SortOrder, Status, \
-    Manga, Anime, drop_all_tables
+    Manga, Anime, drop_all_tables, create_app_engine, make_session_factory
 from gui.common import EnumComboBox, MyLabel, KineticScrollArea, RoundedPushButton
 from gui.components import CardContainer, MediaVariants, MediaCard, SpinCard, CreateCategory
 # from gui.interface.media_page import screen_geometry
@@ -661,11 +660,10 @@ async def main():
 
         # Create synchronous engine
 
-    engine = create_async_engine(DATABASE_URL, echo=False)
+    engine = create_app_engine(DATABASE_URL, echo=False)
     await drop_all_tables(engine)
     await init_db(engine)
-    session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False, autocommit=False,
-                                 autoflush=False)
+    session_maker = make_session_factory(engine)
     session = session_maker()
     # session_maker = sessionmaker()
 
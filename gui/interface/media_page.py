@@ -11,7 +11,6 @@ from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QApplication, Q
 from loguru import logger
 from qfluentwidgets import TransparentToolButton, TransparentPushButton, FluentIcon, ProgressRing, getFont, ToolButton, \
     isDarkTheme, setTheme, Theme, FlowLayout, PipsPager, ComboBox
-from scipy.cluster.hierarchy import average
 
 from AnillistPython import MediaStatus, AnilistEpisode, MediaType, AnilistMedia, AnilistTag, MediaGenre, AnilistTitle, \
     AnilistScore, AnilistMediaInfo, MediaQueryBuilder
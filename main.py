@@ -16,13 +16,11 @@ from qfluentwidgets import FluentWindow, FluentIcon, setTheme, Theme, ScrollArea
 from PySide6.QtWidgets import QApplication, QWidget, QFrame, QScrollArea, QVBoxLayout, QHBoxLayout
 import sys
 from qasync import QEventLoop, asyncSlot, asyncClose
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 
 from AnillistPython import MediaType, MediaQueryBuilderBase, SearchQueryBuilder, MediaSeason, MediaSort, \
     MediaQueryBuilder, AnilistMedia, parse_searched_media
 from database import Anime, Manga, AsyncMediaRepository, AsyncLibraryRepository, init_db, drop_all_tables, User, \
-    verify_login_token, populate_reference_tables, get_all_genres, get_all_statuses, get_all_formats, get_all_seasons, \
-    get_all_sources, get_all_relation_types, get_all_character_roles, UserCategory
+    verify_login_token, UserCategory, create_app_engine, make_session_factory, warm_pool
 from gui.components import AddToCategory, CreateCategory
 from gui.interface import HomeInterface, SearchInterface, LibraryInterface, DownloadInterface, MediaPage, LoginWindow,\
     CategoriesInterface
@@ -455,8 +453,13 @@ class MainWindow(MSFluentWindow):
 
     @asyncSlot()
     async def add_medias_to_db(self, data: Union[List[Anime], List[Manga], List[AnilistMedia]], media_type: MediaType):
+        # anilist results are written in batches, orm models still go through create_update_media
+        records = [media for media in data if isinstance(media, AnilistMedia)]
+        if records:
+            await self.async_media_repo.bulk_upsert(records, media_type)
         for media in data:
-            await self.add_media_to_db(media, media_type)
+            if not isinstance(media, AnilistMedia):
+                await self.add_media_to_db(media, media_type)
 
     def resizeEvent(self, event: QtGui.QResizeEvent):
         if self.splashScreen.isVisible():
@@ -596,38 +599,13 @@ async def main():
 
         # Step 2: Setup DB
         logger.info(f"🔌 Connecting to database: {DATABASE_URL}")
-        engine = create_async_engine(DATABASE_URL, echo=False)
+        engine = create_app_engine(DATABASE_URL, echo=False)
         await drop_all_tables(engine)
+        # creates the tables and seeds the enum reference rows
         await init_db(engine)
 
-        session_maker = sessionmaker(
-            bind=engine,
-            class_=AsyncSession,
-            expire_on_commit=False,
-            autocommit=False,
-            autoflush=False,
-        )
-
-        logger.info("Populating database with enums")
-        genres = get_all_genres()
-        status = get_all_statuses()
-        formats = get_all_formats()
-        seasons = get_all_seasons()
-        sources = get_all_sources()
-        relation_types = get_all_relation_types()
-        character_roles = get_all_character_roles()
-
-        # populating the db
-        await  populate_reference_tables(
-            session=session_maker(),
-            status=status,
-            genres=genres,
-            formats=formats,
-            character_roles=character_roles,
-            sources=sources,
-            relation_types=relation_types,
-            seasons=seasons,
-        )
+        session_maker = make_session_factory(engine)
+        await warm_pool(engine)
 
         logger.info("🔍 Looking for saved token")
         user_id, token = load_token()
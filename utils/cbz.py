@@ -1,11 +1,12 @@
 import shutil
 import tempfile
+import threading
 import time
 import zipfile
 from contextlib import suppress
 from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Tuple
 
 from PIL.ImageQt import QPixmap
 from loguru import logger
@@ -37,6 +38,9 @@ class CBZArchive:
         # self.temp_dir = Path(r"D:\Program\Zerokku\.temp\cbz_")
         self.temp_dir = Path(tempfile.mkdtemp(prefix=self.TEMP_DIR_PREFIX, dir=temp_dir))
         self._image_entries: List[str] = []
+        self._page_index: List[Tuple[int, Path]] = []
+        self._extracted: set[int] = set()
+        self._page_locks: List[threading.Lock] = []
 
         try:
             self._initialize_archive()
@@ -45,12 +49,13 @@ class CBZArchive:
             raise e
 
     def _initialize_archive(self) -> None:
-        """Initialize archive by opening zip and extracting image entries."""
+        """Initialize archive by opening zip and indexing image entries, pages are extracted on demand."""
         self._zip = zipfile.ZipFile(self.cbz_path, 'r')
         self._image_entries = self._get_sorted_images()
         if not self._image_entries:
             raise ValueError("No valid images found in CBZ archive")
-        self._extract_to_temp()
+        self._page_index = [(index, self.temp_dir / name) for index, name in enumerate(self._image_entries)]
+        self._page_locks = [threading.Lock() for _ in self._image_entries]
 
     def _get_sorted_images(self) -> List[str]:
         """
@@ -66,13 +71,10 @@ class CBZArchive:
         )
 
     def _extract_to_temp(self) -> None:
-        """Extract image files to temporary directory with error handling."""
+        """Extract all image files to temporary directory with error handling."""
         try:
-            for name in self._image_entries:
-                # Create parent directories if needed
-                target_path = self.temp_dir / name
-                target_path.parent.mkdir(parents=True, exist_ok=True)
-                self._zip.extract(name, self.temp_dir)
+            for index in range(len(self._image_entries)):
+                self.extract_page(index)
 
         except Exception as e:
             logger.error(f"Failed to extract images: {e}")
@@ -80,13 +82,42 @@ class CBZArchive:
         finally:
             self._cleaned_up = False
 
+    def extract_page(self, index: int) -> Path:
+        """
+        Extract a single page to temporary directory if it is not extracted yet.
+
+        Safe to call from worker threads: zipfile serializes raw reads on the shared
+        handle while decompression and the write run concurrently for different pages.
+
+        Args:
+            index: Page index
+
+        Returns:
+            Path to extracted image
+
+        Raises:
+            IndexError: If index is out of range
+        """
+        if not 0 <= index < len(self._page_index):
+            raise IndexError(f"Page index {index} out of range")
+        path = self._page_index[index][1]
+        if index in self._extracted:
+            return path
+
+        with self._page_locks[index]:
+            if index not in self._extracted:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self._zip.extract(self._image_entries[index], self.temp_dir)
+                self._extracted.add(index)
+        return path
+
     def page_count(self) -> int:
         """Return total number of pages in the archive."""
         return len(self._image_entries)
 
     def get_path(self, index: int) -> Path:
         """
-        Get filesystem path for image at given index.
+        Get filesystem path for image at given index, extracting it if needed.
 
         Args:
             index: Page index
@@ -97,9 +128,17 @@ class CBZArchive:
         Raises:
             IndexError: If index is out of range
         """
-        if not 0 <= index < len(self._image_entries):
-            raise IndexError(f"Page index {index} out of range")
-        return self.temp_dir / self._image_entries[index]
+        return self.extract_page(index)
+
+    def page_index(self) -> List[Tuple[int, Path]]:
+        """
+        Get the pre-parsed page index built when the archive was opened.
+        Paths may not exist until the page is extracted with `extract_page`.
+
+        Returns:
+            List of (page index, extraction path) tuples in page order
+        """
+        return self._page_index
 
     def get_data(self, index: int) -> bytes:
         """
@@ -157,6 +196,22 @@ class CBZArchive:
             logger.warning(f"Failed to load pixmap from {path}: {e}")
             return None
 
+    @property
+    def closed(self) -> bool:
+        """Whether the archive file handle has been closed."""
+        return self._zip is None
+
+    def close(self) -> None:
+        """
+        Close the archive file and remove extracted pages.
+
+        Call explicitly rather than relying on garbage collection, so the file handle is
+        released right away (Windows keeps the file locked while it is open). Removing the
+        extracted pages can take a while, callers on the gui thread may run this in a worker.
+        """
+        self._extracted.clear()
+        self.cleanup()
+
     def cleanup(self) -> None:
         """Robust cleanup of temporary directory and zip file with retry logic."""
         if self._cleaned_up:
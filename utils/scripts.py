@@ -1,4 +1,7 @@
+import hashlib
 import os
+import struct
+import threading
 
 import numpy as np
 import sys
@@ -16,6 +19,18 @@ from AnillistPython import MediaSeason
 import cv2
 from PIL import Image, ImageOps, ImageDraw, ImageQt
 
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional, fallback to vectorized numpy
+    njit = None
+    prange = range
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB
+    _turbo_jpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):  # PyTurboJPEG is optional, also needs libjpeg-turbo library
+    _turbo_jpeg = None
+
 
 def detect_faces_and_crop(image_path, target_ratio=16/9):
     # Load image with OpenCV
@@ -152,7 +167,247 @@ def delete_cache_pixmap(self, path: Path) -> None:
     QPixmapCache.remove(key)
 
 
+TILE_CACHE_DIR = Path("./.cache/tiles")
+TILE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+_TILE_HEADER = struct.Struct("<II")  # width, height
+_tile_cache_lock = threading.Lock()
+_tile_cache_bytes: Optional[int] = None  # size of the cache on disk, scanned by the first prune
+
+
+def tile_cache_key(*parts) -> str:
+    """Stable key for a decoded tile, e.g. tile_cache_key(archive, page, width)."""
+    return hashlib.sha1(":".join(map(str, parts)).encode()).hexdigest()
+
+
+def load_cached_tile(key: str) -> Optional[QImage]:
+    """
+    Load a decoded tile stored by `store_cached_tile`.
+
+    Args:
+        key (str): Key from `tile_cache_key`
+
+    Returns:
+        Optional[QImage]: ARGB32 image or None on cache miss
+    """
+    path = TILE_CACHE_DIR / f"{key}.bgra"
+    try:
+        data = path.read_bytes()
+        # mtime is the last use, least recently used tiles are pruned first
+        os.utime(path)
+    except OSError:
+        return None
+
+    if len(data) < _TILE_HEADER.size:
+        return None
+    width, height = _TILE_HEADER.unpack_from(data)
+    if len(data) != _TILE_HEADER.size + width * height * 4:
+        return None
+
+    return QImage(data[_TILE_HEADER.size:], width, height, width * 4, QImage.Format.Format_ARGB32).copy()
+
+
+def store_cached_tile(key: str, image: QImage) -> None:
+    """
+    Store image as raw BGRA blob so it can be loaded back without decoding. The cache is kept under
+    TILE_CACHE_MAX_BYTES, see `prune_tile_cache`.
+
+    Args:
+        key (str): Key from `tile_cache_key`
+        image (QImage): Decoded image
+    """
+    global _tile_cache_bytes
+    if image.isNull():
+        return
+    path = TILE_CACHE_DIR / f"{key}.bgra"
+    try:
+        # already cached (page was loaded from disk), only mark it as used
+        os.utime(path)
+        return
+    except OSError:
+        pass
+    image = image.convertToFormat(QImage.Format.Format_ARGB32)
+    width, height = image.width(), image.height()
+    tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+    try:
+        TILE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, "wb") as file:
+            file.write(_TILE_HEADER.pack(width, height))
+            file.write(bytes(image.constBits())[:width * height * 4])
+        os.replace(tmp_path, path)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+        return
+
+    with _tile_cache_lock:
+        if _tile_cache_bytes is not None:
+            _tile_cache_bytes += _TILE_HEADER.size + width * height * 4
+            if _tile_cache_bytes <= TILE_CACHE_MAX_BYTES:
+                return
+    prune_tile_cache()
+
+
+def prune_tile_cache(max_bytes: Optional[int] = None) -> int:
+    """
+    Delete least recently used tiles (oldest mtime) once the cache is over max_bytes.
+
+    Args:
+        max_bytes (Optional[int]): Byte budget, defaults to TILE_CACHE_MAX_BYTES. The cache is pruned down to 3/4
+            of it so not every store prunes
+
+    Returns:
+        int: Bytes left in the cache
+    """
+    global _tile_cache_bytes
+    if max_bytes is None:
+        max_bytes = TILE_CACHE_MAX_BYTES
+    with _tile_cache_lock:
+        tiles = []
+        for path in TILE_CACHE_DIR.glob("*.bgra"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            tiles.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in tiles)
+        if total > max_bytes:
+            tiles.sort()
+            for _, size, path in tiles:
+                if total <= max_bytes * 3 // 4:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    continue
+                total -= size
+        _tile_cache_bytes = total
+        return total
+
+
+def _bilinear_downscale(src: np.ndarray, out_h: int, out_w: int) -> np.ndarray:
+    h, w, c = src.shape
+    dst = np.empty((out_h, out_w, c), dtype=np.uint8)
+    scale_y = h / out_h
+    scale_x = w / out_w
+    for y in prange(out_h):
+        fy = min(max((y + 0.5) * scale_y - 0.5, 0.0), h - 1.0)
+        y0 = int(fy)
+        y1 = min(y0 + 1, h - 1)
+        wy = fy - y0
+        for x in range(out_w):
+            fx = min(max((x + 0.5) * scale_x - 0.5, 0.0), w - 1.0)
+            x0 = int(fx)
+            x1 = min(x0 + 1, w - 1)
+            wx = fx - x0
+            for ch in range(c):
+                top = src[y0, x0, ch] * (1.0 - wx) + src[y0, x1, ch] * wx
+                bottom = src[y1, x0, ch] * (1.0 - wx) + src[y1, x1, ch] * wx
+                dst[y, x, ch] = np.uint8(top * (1.0 - wy) + bottom * wy + 0.5)
+    return dst
+
+
+def _bilinear_downscale_numpy(src: np.ndarray, out_h: int, out_w: int) -> np.ndarray:
+    h, w, _ = src.shape
+    fy = np.clip((np.arange(out_h) + 0.5) * (h / out_h) - 0.5, 0, h - 1)
+    fx = np.clip((np.arange(out_w) + 0.5) * (w / out_w) - 0.5, 0, w - 1)
+    y0 = fy.astype(np.intp)
+    x0 = fx.astype(np.intp)
+    y1 = np.minimum(y0 + 1, h - 1)
+    x1 = np.minimum(x0 + 1, w - 1)
+    wy = (fy - y0)[:, None, None]
+    wx = (fx - x0)[None, :, None]
+
+    src = src.astype(np.float32)
+    top = src[y0][:, x0] * (1 - wx) + src[y0][:, x1] * wx
+    bottom = src[y1][:, x0] * (1 - wx) + src[y1][:, x1] * wx
+    return (top * (1 - wy) + bottom * wy + 0.5).astype(np.uint8)
+
+
+if njit is not None:
+    _bilinear_downscale = njit(parallel=True, cache=True)(_bilinear_downscale)
+else:
+    _bilinear_downscale = _bilinear_downscale_numpy
+
+
+def downscale_image(image: QImage, width: int) -> QImage:
+    """
+    Downscale image to given width (keeping aspect ratio) with bilinear filtering.
+
+    Runs on a numpy view of the image buffer so it is safe to call from worker threads,
+    compiled with numba when it is installed.
+
+    Args:
+        image (QImage): Source image
+        width (int): Target width, image is returned as is if it is not wider
+
+    Returns:
+        QImage: Downscaled image in ARGB32 format
+    """
+    if image.isNull() or width <= 0 or image.width() <= width:
+        return image
+
+    image = image.convertToFormat(QImage.Format.Format_ARGB32)
+    w, h = image.width(), image.height()
+    height = max(1, round(h * width / w))
+
+    buffer = np.frombuffer(image.constBits(), dtype=np.uint8)
+    src = buffer.reshape(h, image.bytesPerLine())[:, :w * 4].reshape(h, w, 4)
+    dst = np.ascontiguousarray(_bilinear_downscale(src, height, width))
+
+    return QImage(dst.data, width, height, width * 4, QImage.Format.Format_ARGB32).copy()
+
+
+
+
+
+def _jpeg_has_exif(data: bytes) -> bool:
+    """Walk the jpeg header segments up to the scan data, True if an APP1 Exif segment is found."""
+    pos = 2
+    while pos + 4 <= len(data) and data[pos] == 0xFF:
+        marker = data[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker == 0xDA or marker == 0xD9:  # start of scan / end of image, no more header segments
+            return False
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:  # standalone markers carry no length
+            pos += 2
+            continue
+        if marker == 0xE1 and data[pos + 4:pos + 10] == b"Exif\x00\x00":
+            return True
+        pos += 2 + int.from_bytes(data[pos + 2:pos + 4], "big")
+    return False
+
+
+def decode_jpeg(data: bytes, max_width: int = 0) -> Optional[QImage]:
+    """
+    Decode jpeg bytes with libjpeg-turbo (SIMD IDCT) when PyTurboJPEG is installed.
+
+    Args:
+        data (bytes): Encoded image
+        max_width (int): Decode with the largest DCT scaling that keeps image at least this wide, 0 for full size
+
+    Returns:
+        Optional[QImage]: Decoded image in RGB32 format, None if turbojpeg is unavailable, data is not
+        a jpeg, carries EXIF (orientation is left to QImageReader) or fails to decode
+    """
+    if _turbo_jpeg is None or data[:2] != b"\xff\xd8" or _jpeg_has_exif(data):
+        return None
+    try:
+        scaling = None
+        if max_width:
+            width = _turbo_jpeg.decode_header(data)[0]
+            for num, denom in sorted(_turbo_jpeg.scaling_factors, key=lambda factor: factor[0] / factor[1]):
+                if width * num / denom >= max_width:
+                    scaling = (num, denom)
+                    break
+        array = _turbo_jpeg.decode(data, pixel_format=TJPF_RGB, scaling_factor=scaling)
+    except Exception:
+        return None
 
+    array = np.ascontiguousarray(array)
+    h, w = array.shape[:2]
+    # convert detaches image from numpy buffer
+    return QImage(array.data, w, h, w * 3, QImage.Format.Format_RGB888).convertToFormat(QImage.Format.Format_RGB32)
 
 
 def seconds_to_time_string(seconds: Union[int, float]) -> str: